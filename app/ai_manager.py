@@ -1,83 +1,202 @@
-
+import asyncio
+import hashlib
 import json
 import logging
+import random
+import threading
 import time
-from typing import Optional, Dict
-from cerebras.cloud.sdk import Cerebras
+import httpx
+from collections import OrderedDict
+from typing import Optional, Dict, List
+from cerebras.cloud.sdk import Cerebras, AsyncCerebras
 from app.config_manager import config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keep TLS connections warm across prompt requests
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+HTTP_TIMEOUT = 30.0
+PROMPT_CACHE_SIZE = 4096
+
 class AIManager:
     def __init__(self):
         self.api_key = config.api_keys.get("cerebras")
         self.model = config.ai_settings.get("model", "llama3.1-70b") # Cerebras supports specific models
         self.max_retries = config.ai_settings.get("max_retries", 3)
+        self.max_concurrency = config.ai_settings.get("max_concurrency", 5)
+        
+        self.system_prompt = config.ai_settings.get("system_prompt", "Generate an SDXL prompt.")
+        
+        # We will use a simplified JSON schema for the output to ensure we get just the prompt
+        self.schema = {
+            "type": "object",
+            "properties": {
+                "detailed_prompt": {"type": "string", "description": "The SDXL optimized prompt"},
+            },
+            "required": ["detailed_prompt"]
+        }
+        
+        # Static parts of every request, built once. Keeping the system message identical
+        # across calls also lets the provider reuse its prompt cache.
+        self._system_message = {"role": "system", "content": self.system_prompt}
+        # Note: Cerebras SDK usage for JSON mode might differ slightly from OpenAI, 
+        # Check their documentation
+        self._response_format = {
+            "type": "json_schema",
+            "json_schema": {"name": "prompt_response", "strict": True, "schema": self.schema}
+        }
         
+        # Prompts already generated for a segment, keyed by a digest of its text
+        self._prompt_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
         if not self.api_key:
             logger.error("Cerebras API key not found in config.")
             raise ValueError("Cerebras API key is missing.")
 
         try:
-            self.client = Cerebras(api_key=self.api_key)
+            self._http = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            self.client = Cerebras(api_key=self.api_key, http_client=self._http)
             logger.info("Cerebras client initialized.")
         except Exception as e:
             raise ValueError(f"Failed to initialize Cerebras client: {e}")
 
+    def _build_request(self, script_segment: str) -> dict:
+        """Builds the chat completion arguments shared by the sync and async paths."""
+        return {
+            "model": self.model,
+            "messages": [
+                self._system_message,
+                {"role": "user", "content": f"Script segment: '{script_segment}'\n\nGenerate SDXL prompt:"}
+            ],
+            "response_format": self._response_format,
+            "temperature": 0.7,
+            "max_tokens": 500
+        }
+
+    @staticmethod
+    def _cache_key(script_segment: str) -> bytes:
+        return hashlib.blake2b(script_segment.strip().encode("utf-8"), digest_size=16).digest()
+
+    def _cached_prompt(self, key: bytes) -> Optional[str]:
+        with self._cache_lock:
+            prompt = self._prompt_cache.get(key)
+            if prompt is not None:
+                self._prompt_cache.move_to_end(key)
+            return prompt
+
+    def _store_prompt(self, key: bytes, prompt: str):
+        with self._cache_lock:
+            self._prompt_cache[key] = prompt
+            self._prompt_cache.move_to_end(key)
+            if len(self._prompt_cache) > PROMPT_CACHE_SIZE:
+                self._prompt_cache.popitem(last=False)
+
+    @staticmethod
+    def _retry_delay(attempt: int, error: Exception) -> float:
+        """Exponential backoff with jitter; rate-limit (429) errors back off longer."""
+        delay = min(8.0, 0.5 * (2 ** (attempt - 1)))
+        if getattr(error, "status_code", None) == 429:
+            delay = min(30.0, delay * 4)
+        return delay + random.uniform(0, 0.25)
+
+    @staticmethod
+    def _extract_prompt(completion) -> Optional[str]:
+        content = completion.choices[0].message.content
+        data = json.loads(content)
+        return data.get("detailed_prompt")
+
     def generate_prompts(self, script_segment: str) -> str:
         """
         Generates an image prompt based on the provided script segment.
         Retries up to max_retries. Falls back to a random generic prompt on failure.
+        Segments seen before are answered from the cache without an API call.
         """
-        system_prompt = config.ai_settings.get("system_prompt", "Generate an SDXL prompt.")
-        
-        # We will use a simplified JSON schema for the output to ensure we get just the prompt
-        schema = {
-            "type": "object",
-            "properties": {
-                "detailed_prompt": {"type": "string", "description": "The SDXL optimized prompt"},
-            },
-            "required": ["detailed_prompt"]
-        }
+        key = self._cache_key(script_segment)
+        cached = self._cached_prompt(key)
+        if cached is not None:
+            return cached
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Script segment: '{script_segment}'\n\nGenerate SDXL prompt:"}
-        ]
+        request = self._build_request(script_segment)
 
         for attempt in range(1, self.max_retries + 1):
             try:
-                completion = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    # Note: Cerebras SDK usage for JSON mode might differ slightly from OpenAI, 
-                    # Check their documentation
-                    response_format={
-                        "type": "json_schema",
-                        "json_schema": {"name": "prompt_response", "strict": True, "schema": schema}
-                    },
-                    temperature=0.7,
-                    max_tokens=500
-                )
+                completion = self.client.chat.completions.create(**request)
+                prompt = self._extract_prompt(completion)
                 
-                content = completion.choices[0].message.content
-                data = json.loads(content)
-                prompt = data.get("detailed_prompt")
+                if prompt:
+                    self._store_prompt(key, prompt)
+                    return prompt
+                    
+            except Exception as e:
+                logger.warning(f"Attempt {attempt}/{self.max_retries} failed: {e}")
+                if attempt < self.max_retries:
+                    time.sleep(self._retry_delay(attempt, e))
+
+        logger.error("All attempts to generate prompt failed. Using fallback.")
+        return self._get_fallback_prompt()
+
+    async def _generate_one(self, client: AsyncCerebras, semaphore: asyncio.Semaphore, script_segment: str) -> str:
+        """Async counterpart of generate_prompts, used by generate_prompts_batch."""
+        request = self._build_request(script_segment)
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with semaphore:
+                    completion = await client.chat.completions.create(**request)
+                prompt = self._extract_prompt(completion)
                 
                 if prompt:
+                    self._store_prompt(self._cache_key(script_segment), prompt)
                     return prompt
                     
             except Exception as e:
                 logger.warning(f"Attempt {attempt}/{self.max_retries} failed: {e}")
-                time.sleep(1) 
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._retry_delay(attempt, e))
 
         logger.error("All attempts to generate prompt failed. Using fallback.")
         return self._get_fallback_prompt()
 
+    async def _generate_batch(self, segments: List[str]) -> List[str]:
+        # The async client is bound to the running event loop, so it is created per batch
+        # rather than kept on the instance across asyncio.run() calls.
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        http_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        async with AsyncCerebras(api_key=self.api_key, http_client=http_client) as client:
+            return await asyncio.gather(
+                *[self._generate_one(client, semaphore, segment) for segment in segments]
+            )
+
+    def generate_prompts_batch(self, segments: List[str]) -> List[str]:
+        """
+        Generates one image prompt per script segment, issuing the requests concurrently.
+        At most `max_concurrency` requests are in flight at once. Results keep the input order.
+        Cached and duplicate segments are requested only once.
+        """
+        if not segments:
+            return []
+
+        keys = [self._cache_key(segment) for segment in segments]
+        prompts = {}
+        missing = {}  # key -> segment still to request
+        for key, segment in zip(keys, segments):
+            if key in prompts or key in missing:
+                continue
+            cached = self._cached_prompt(key)
+            if cached is not None:
+                prompts[key] = cached
+            else:
+                missing[key] = segment
+
+        if missing:
+            generated = asyncio.run(self._generate_batch(list(missing.values())))
+            prompts.update(zip(missing.keys(), generated))
+        return [prompts[key] for key in keys]
+
     def _get_fallback_prompt(self) -> str:
-        import random
         subjects = config.ai_settings.get("fallback_prompts", [
             "abstract cinematic background", 
             "dark ambiance"
@@ -85,9 +204,19 @@ class AIManager:
         general_style = config.ai_settings.get("general_fallback_prompt", "cinematic, 4k")
         return f"{random.choice(subjects)}, {general_style}"
 
+    def close(self):
+        """Closes the pooled HTTP client of the sync Cerebras client."""
+        self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
 if __name__ == "__main__":
     try:
-        ai = AIManager()
-        print(ai.generate_prompts("They didn't break you, they revealed you."))
+        with AIManager() as ai:
+            print(ai.generate_prompts("They didn't break you, they revealed you."))
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,135 @@
+"""
+Assembly Worker - Builds one final video from its images, audio and subtitles
+Runs in a worker process, so it only takes plain data and imports nothing heavier
+than the assembly tools themselves.
+"""
+
+import logging
+import threading
+import traceback
+from pathlib import Path
+from typing import Dict, Any
+
+from app.short_clips_maker import DynamicVideoGenerator
+from app.caption_burner import CaptionBurner
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tools are stateless between videos, so each worker builds them once
+_tools = threading.local()
+
+
+def _get_tools(encoder_threads: int = 0):
+    if not hasattr(_tools, "clip_maker"):
+        # Single-threaded OpenCV for the same reason create_video gets workers=1 below
+        _tools.clip_maker = DynamicVideoGenerator(threads=1)
+        _tools.burner = CaptionBurner(threads=encoder_threads)
+    return _tools
+
+
+def assemble_video(item: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Animates the images, stitches them, adds the voice-over and burns the captions for one
+    item in a single FFmpeg pass. Clips are only rendered to disk for effects that have
+    no FFmpeg filter equivalent.
+
+    Args:
+        item: Pipeline item (id, image_paths, files, script_text)
+        settings: Config snapshot from VideoPipeline._assembly_settings(), including the
+            run's CaptionStyle, plus "encoder_threads" for each worker's encodes
+
+    Returns:
+        Fields to merge back into the item: "status" and, on success, "final_path"
+    """
+    status_vals = settings["status_values"]
+    temp_dir = Path(settings["temp_dir"])
+    output_dir = Path(settings["output_dir"])
+    try:
+        item_id = item["id"]
+        if not item.get("image_paths") or not all(item["image_paths"]):
+            logger.error(f"Missing images for {item_id}")
+            return {"status": status_vals.get("failed_images", "Failed Images")}
+
+        video_settings = settings["video"]
+        video_width = video_settings["width"]
+        video_height = video_settings["height"]
+        fps = video_settings["fps"]
+        clip_dur = video_settings["clip_duration"]
+        tools = _get_tools(settings.get("encoder_threads", 0))
+
+        # 1. Describe Clips: one looped-image input and filter chain per image
+        clip_maker = tools.clip_maker
+        video_inputs = []
+        clip_chains = []
+
+        for i, img_path in enumerate(item["image_paths"]):
+            output_clip_name = str(temp_dir / f"clip_{item_id}_{i}.mp4")
+
+            effects = []
+            if i == 0:
+                effects = [
+                    {'type': 'zoom', 'mode': 'in', 'start': 0, 'duration': clip_dur, 'easing': 'linear'},
+                    {'type': 'fade', 'mode': 'out', 'start': clip_dur - 1.0, 'duration': 1.0}
+                ]
+            elif i == len(item["image_paths"]) - 1:
+                effects = [
+                    {'type': 'fade', 'mode': 'in', 'start': 0, 'duration': 1.0},
+                    {'type': 'zoom', 'mode': 'out', 'start': 0, 'duration': clip_dur, 'easing': 'linear'},
+                     {'type': 'fade', 'mode': 'out', 'start': clip_dur - 1.0, 'duration': 1.0}
+                ]
+            else:
+                effects = [
+                    {'type': 'fade', 'mode': 'in', 'start': 0, 'duration': 1.0},
+                    {'type': 'fade', 'mode': 'out', 'start': clip_dur - 1.0, 'duration': 1.0}
+                ]
+
+            clip_filter = clip_maker.build_filter(
+                effects, width=video_width, height=video_height, fps=fps, duration=clip_dur
+            )
+            if clip_filter is not None:
+                video_inputs += ['-loop', '1', '-framerate', str(fps), '-t', str(clip_dur), '-i', str(img_path)]
+            else:
+                clip_maker.create_video(
+                    image_path=str(img_path),
+                    output_path=output_clip_name,
+                    effects_list=effects,
+                    width=video_width,
+                    height=video_height,
+                    fps=fps,
+                    duration=clip_dur,
+                    # Assembly already runs one process per core
+                    workers=1,
+                    render_scale=video_settings.get("render_scale", 1.0)
+                )
+                video_inputs += ['-i', output_clip_name]
+                clip_filter = f"scale={video_width}:{video_height},setsar=1,fps={fps},format=yuv420p"
+            clip_chains.append(f"[{i}:v]{clip_filter}[v{i}]")
+
+        labels = "".join(f"[v{i}]" for i in range(len(clip_chains)))
+        video_graph = ";".join(clip_chains) + f";{labels}concat=n={len(clip_chains)}:v=1:a=0[video]"
+
+        # 2. Animate + Stitch + Add Audio + Burn Captions, encoded once
+        final_path = str(output_dir / f"video_{item_id}.mp4")
+        tools.burner.compose_and_burn(
+            video_inputs=video_inputs,
+            video_graph=video_graph,
+            video_info={"width": video_width, "height": video_height, "fps": fps},
+            audio_path=item["files"]["audio"],
+            srt_path=item["files"]["srt"],
+            output_path=final_path,
+            style=settings["caption_style"]
+        )
+
+        # Save Script Text
+        script_file_path = str(output_dir / f"script_{item_id}.txt")
+        with open(script_file_path, "w", encoding="utf-8") as f:
+            f.write(item["script_text"])
+
+        logger.info(f"Video completed: {final_path}")
+        return {"status": status_vals.get("done", "Done"), "final_path": final_path}
+
+    except Exception as e:
+        logger.error(f"Assembly failed for {item.get('id')}: {e}")
+        traceback.print_exc()
+        return {"status": status_vals.get("failed_assembly", "Failed Assembly")}
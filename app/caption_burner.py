@@ -6,12 +6,31 @@ Uses FFmpeg and Pillow for advanced text rendering with custom fonts
 import subprocess
 import re
 import os
+import math
+import functools
 from pathlib import Path
-from typing import Tuple, List, Optional, Dict
+from typing import Tuple, List, Optional, Dict, Callable
 from dataclasses import dataclass
 from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+import cv2
 import tempfile
 import shutil
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from app.video_assembler import FFMPEG_BIN, FFPROBE_BIN
+
+try:
+    import skia  # Optional: faster native rasterization for backend="skia"
+except ImportError:
+    skia = None
+
+try:
+    import av  # Optional: read video info in-process instead of spawning ffprobe
+except ImportError:
+    av = None
 
 
 @dataclass
@@ -30,6 +49,8 @@ class CaptionStyle:
     shadow_offset: Tuple[int, int] = (3, 3)
     shadow_color: Tuple[int, int, int, int] = (0, 0, 0, 128)  # RGBA with alpha
     max_width: int = 1800  # Maximum text width before wrapping
+    renderer: str = "ass"  # "ass" (FFmpeg/libass, fast) or "pil" (PNG overlays)
+    backend: str = "pil"  # Rasterizer for renderer="pil" images: "pil" or "skia" (needs skia-python)
 
 
 @dataclass
@@ -41,144 +62,256 @@ class SubtitleEntry:
     text: str
 
 
+# Timestamp line: 00:00:01,500 --> 00:00:04,000
+_TS_RE = re.compile(r'(\d{2}):(\d{2}):(\d{2}),(\d{3})\s*-->\s*(\d{2}):(\d{2}):(\d{2}),(\d{3})')
+
+
+# Keep caption temp files in RAM where available (Linux)
+_TEMP_ROOT = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# ASS alignment (numpad layout) for each caption position
+_ASS_ALIGNMENT = {"top": 8, "middle": 5, "bottom": 2}
+
+
+def _ass_color(rgb: Tuple[int, ...], alpha: int = 255) -> str:
+    """Convert RGB(A) to ASS &HAABBGGRR (ASS alpha is inverted: 00 = opaque)."""
+    r, g, b = rgb[:3]
+    if len(rgb) > 3:
+        alpha = rgb[3]
+    return f"&H{255 - alpha:02X}{b:02X}{g:02X}{r:02X}"
+
+
+def _ass_timestamp(seconds: float) -> str:
+    """Format seconds as ASS h:mm:ss.cc"""
+    cs = int(round(seconds * 100))
+    h, cs = divmod(cs, 360000)
+    m, cs = divmod(cs, 6000)
+    s, cs = divmod(cs, 100)
+    return f"{h}:{m:02}:{s:02}.{cs:02}"
+
+
+def _ass_text(text: str) -> str:
+    """
+    Escape caption text for an ASS Dialogue line, so libass draws braces and backslashes
+    literally instead of reading them as override tags or \\N / \\h escapes.
+    Line breaks become ASS hard breaks.
+    """
+    text = text.replace('\\', '\\\\').replace('{', '\\{').replace('}', '\\}')
+    return text.replace('\n', '\\N')
+
+
+def _escape_filter_value(value: str) -> str:
+    """Escape a path for use as an FFmpeg filter option value (e.g. Windows drive colons)."""
+    value = value.replace('\\', '/').replace(':', '\\:')
+    return f"'{value}'"
+
+
+def _escape_concat_path(path: str) -> str:
+    """Escape a path for a quoted `file '...'` line in an ffconcat manifest."""
+    return path.replace('\\', '/').replace("'", "'\\''")
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_srt_cached(srt_path: str, mtime_ns: int, size: int) -> Tuple[SubtitleEntry, ...]:
+    """Parse an SRT file. mtime_ns and size are only part of the cache key."""
+    with open(srt_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    lines = content.splitlines()
+    num_lines = len(lines)
+    subtitles = []
+    i = 0
+    
+    # Walk the lines once; a block is a run of non-blank lines: index, timestamp, text...
+    while i < num_lines:
+        if not lines[i].strip():
+            i += 1
+            continue
+        
+        block_start = i
+        while i < num_lines and lines[i].strip():
+            i += 1
+        
+        if i - block_start < 3:
+            continue
+        
+        try:
+            index = int(lines[block_start])
+        except ValueError:
+            continue
+        
+        match = _TS_RE.match(lines[block_start + 1].strip())
+        if match:
+            h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, match.groups())
+            start_time = h1 * 3600 + m1 * 60 + s1 + ms1 * 0.001
+            end_time = h2 * 3600 + m2 * 60 + s2 + ms2 * 0.001
+            text = '\n'.join(lines[block_start + 2:i]).strip()
+            
+            subtitles.append(SubtitleEntry(index, start_time, end_time, text))
+    
+    return tuple(subtitles)
+
+
+def _detect_system_font() -> Optional[str]:
+    """Return the first available platform default font, checked once at import"""
+    if os.name == 'nt':
+        return "C:/Windows/Fonts/arial.ttf"
+    for candidate in (
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux
+        "/System/Library/Fonts/Helvetica.ttc"  # Mac
+    ):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+_SYSTEM_FONT = _detect_system_font()
+
+
+@functools.lru_cache(maxsize=16)
+def _load_font(font_path: Optional[str], font_size: int) -> ImageFont.FreeTypeFont:
+    """Load a font once per (path, size); font objects are read-only and safe to share."""
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except Exception as e:
+            print(f"Warning: Could not load font {font_path}: {e}")
+            print("Falling back to default font")
+    
+    # Try to use a default system font
+    if _SYSTEM_FONT:
+        try:
+            return ImageFont.truetype(_SYSTEM_FONT, font_size)
+        except Exception:
+            pass
+    
+    # Fall back to PIL default
+    return ImageFont.load_default()
+
+
 class CaptionBurner:
-    """Burns SRT subtitles onto videos with custom styling using Pillow and FFmpeg"""
+    """
+    Burns SRT subtitles onto videos with custom styling.
+    By default captions are converted to ASS and rendered by FFmpeg's libass in a single
+    filter; style.renderer = "pil" draws each caption with Pillow and overlays the PNGs.
+    """
     
-    def __init__(self):
+    def __init__(self, threads: int = 0):
+        """
+        Args:
+            threads: Encoder threads per encode, and processes for the pil renderer; 0 uses
+                every core. When several burners encode at the same time, pass
+                threads_per_job(n_jobs) from app.video_assembler so they don't
+                oversubscribe the CPU.
+        """
         self.temp_dir = None
+        self.threads = threads
     
     def parse_srt(self, srt_path: str) -> List[SubtitleEntry]:
-        """Parse SRT file into subtitle entries"""
-        with open(srt_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Split by double newlines (subtitle blocks)
-        blocks = re.split(r'\n\s*\n', content.strip())
-        
-        subtitles = []
-        for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) < 3:
-                continue
-            
-            try:
-                index = int(lines[0])
-                time_line = lines[1]
-                text = '\n'.join(lines[2:])
-                
-                # Parse timestamp: 00:00:01,500 --> 00:00:04,000
-                match = re.match(r'(\d{2}):(\d{2}):(\d{2}),(\d{3})\s*-->\s*(\d{2}):(\d{2}):(\d{2}),(\d{3})', time_line)
-                if match:
-                    h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, match.groups())
-                    start_time = h1 * 3600 + m1 * 60 + s1 + ms1 / 1000
-                    end_time = h2 * 3600 + m2 * 60 + s2 + ms2 / 1000
-                    
-                    subtitles.append(SubtitleEntry(index, start_time, end_time, text))
-            except (ValueError, IndexError):
-                continue
-        
-        return subtitles
+        """
+        Parse SRT file into subtitle entries.
+        Results are cached per (path, mtime, size), so the entries are shared and
+        should be treated as read-only.
+        """
+        st = os.stat(srt_path)
+        return list(_parse_srt_cached(srt_path, st.st_mtime_ns, st.st_size))
     
     def _get_font(self, style: CaptionStyle) -> ImageFont.FreeTypeFont:
         """Load font from path or use default"""
-        if style.font_path and os.path.exists(style.font_path):
-            try:
-                return ImageFont.truetype(style.font_path, style.font_size)
-            except Exception as e:
-                print(f"Warning: Could not load font {style.font_path}: {e}")
-                print("Falling back to default font")
-        
-        # Try to use a default system font
-        try:
-            # Windows
-            if os.name == 'nt':
-                return ImageFont.truetype("C:/Windows/Fonts/arial.ttf", style.font_size)
-            # Linux
-            elif os.path.exists("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"):
-                return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", style.font_size)
-            # Mac
-            elif os.path.exists("/System/Library/Fonts/Helvetica.ttc"):
-                return ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", style.font_size)
-        except:
-            pass
-        
-        # Fall back to PIL default
-        return ImageFont.load_default()
+        return _load_font(style.font_path, style.font_size)
     
     def _wrap_text(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
         """Wrap text to fit within max_width"""
         words = text.split()
+        if not words:
+            return [text]
+        
+        # Most cues are a few words and fit on one line: one measurement decides it
+        single_line = ' '.join(words)
+        if font.getlength(single_line) <= max_width:
+            return [single_line]
+        
+        # Measure each word once by advance width (no rasterization) and pack greedily
+        space_width = font.getlength(' ')
         lines = []
-        current_line = []
+        current_line = [words[0]]
+        current_width = font.getlength(words[0])
         
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            bbox = font.getbbox(test_line)
-            width = bbox[2] - bbox[0]
-            
-            if width <= max_width:
+        for word in words[1:]:
+            word_width = font.getlength(word)
+            if current_width + space_width + word_width <= max_width:
                 current_line.append(word)
+                current_width += space_width + word_width
             else:
-                if current_line:
-                    lines.append(' '.join(current_line))
+                lines.append(' '.join(current_line))
                 current_line = [word]
+                current_width = word_width
         
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return lines if lines else [text]
+        lines.append(' '.join(current_line))
+        return lines
     
-    def _draw_text_with_outline(
-        self, 
-        draw: ImageDraw.Draw, 
-        position: Tuple[int, int], 
-        text: str, 
-        font: ImageFont.FreeTypeFont,
-        fill_color: Tuple[int, int, int],
-        outline_color: Tuple[int, int, int],
-        outline_width: int
-    ):
-        """Draw text with outline effect"""
-        x, y = position
-        
-        # Draw outline by drawing text in all directions
-        for offset_x in range(-outline_width, outline_width + 1):
-            for offset_y in range(-outline_width, outline_width + 1):
-                if offset_x != 0 or offset_y != 0:
-                    draw.text((x + offset_x, y + offset_y), text, font=font, fill=outline_color)
-        
-        # Draw main text
-        draw.text((x, y), text, font=font, fill=fill_color)
+    @staticmethod
+    def _dilate_mask(mask: Image.Image, radius: int) -> Image.Image:
+        """Grow an alpha mask by radius pixels with a round kernel (outline of the glyphs)"""
+        if radius <= 0:
+            return mask
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * radius + 1, 2 * radius + 1))
+        return Image.fromarray(cv2.dilate(np.asarray(mask), kernel))
     
-    def create_caption_image(
-        self, 
-        text: str, 
-        video_width: int, 
-        video_height: int, 
-        style: CaptionStyle
-    ) -> Image.Image:
-        """Create a transparent PNG with styled caption text"""
+    def _layout_caption(self, text: str, style: CaptionStyle) -> Dict:
+        """Wrap text and compute line positions and image size (shared by all backends)"""
         font = self._get_font(style)
         
         # Wrap text
         lines = self._wrap_text(text, font, style.max_width)
         
-        # Calculate text dimensions
-        line_heights = []
-        line_widths = []
-        for line in lines:
-            bbox = font.getbbox(line)
-            line_widths.append(bbox[2] - bbox[0])
-            line_heights.append(bbox[3] - bbox[1])
+        # Calculate text dimensions: advance widths per line, one constant line height
+        ascent, descent = font.getmetrics()
+        line_height = ascent + descent
+        line_widths = [int(math.ceil(font.getlength(line))) for line in lines]
         
         max_line_width = max(line_widths) if line_widths else 0
-        total_height = sum(line_heights) + (len(lines) - 1) * 10  # 10px spacing between lines
+        total_height = line_height * len(lines) + (len(lines) - 1) * 10  # 10px spacing between lines
         
         # Add padding for outline and shadow
         padding = style.outline_width * 2 + (style.shadow_offset[0] if style.shadow else 0) + 10
         img_width = max_line_width + padding * 2 + style.background_padding * 2
         img_height = total_height + padding * 2 + style.background_padding * 2
         
+        # Top-left corner of each line: centered horizontally, stacked from the top padding
+        positions = []
+        text_y = padding + style.background_padding
+        for line_width in line_widths:
+            positions.append(((img_width - line_width) // 2, text_y))
+            text_y += line_height + 10  # Move down for next line
+        
+        return {
+            'font': font,
+            'lines': lines,
+            'positions': positions,
+            'ascent': ascent,
+            'width': img_width,
+            'height': img_height
+        }
+    
+    def create_caption_image(
+        self, 
+        text: str, 
+        video_width: int, 
+        video_height: int, 
+        style: CaptionStyle
+    ) -> Image.Image:
+        """Create a transparent PNG with styled caption text"""
+        if style.backend == "skia":
+            if skia is not None:
+                return self._create_caption_image_skia(text, style)
+            print("Warning: skia-python is not installed, falling back to Pillow")
+        
+        layout = self._layout_caption(text, style)
+        font = layout['font']
+        img_width = layout['width']
+        img_height = layout['height']
+        
         # Create transparent image
         img = Image.new('RGBA', (img_width, img_height), (0, 0, 0, 0))
         draw = ImageDraw.Draw(img)
@@ -193,47 +326,72 @@ class CaptionBurner:
             ]
             draw.rectangle(bg_rect, fill=style.background_color)
         
-        # Calculate starting Y position for vertically centered text
-        text_y = padding + style.background_padding
+        # Rasterize the fill of every line once into a single alpha mask
+        fill_mask = Image.new('L', (img_width, img_height), 0)
+        mask_draw = ImageDraw.Draw(fill_mask)
         
-        # Draw each line
-        for i, line in enumerate(lines):
-            line_width = line_widths[i]
-            line_height = line_heights[i]
-            
-            # Center horizontally
-            text_x = (img_width - line_width) // 2
-            
-            # Draw shadow if enabled
-            if style.shadow:
-                shadow_x = text_x + style.shadow_offset[0]
-                shadow_y = text_y + style.shadow_offset[1]
-                
-                # Create shadow layer
-                for offset_x in range(-style.outline_width, style.outline_width + 1):
-                    for offset_y in range(-style.outline_width, style.outline_width + 1):
-                        draw.text(
-                            (shadow_x + offset_x, shadow_y + offset_y), 
-                            line, 
-                            font=font, 
-                            fill=style.shadow_color
-                        )
-            
-            # Draw text with outline
-            self._draw_text_with_outline(
-                draw, 
-                (text_x, text_y), 
-                line, 
-                font,
-                style.font_color,
-                style.outline_color,
-                style.outline_width
-            )
-            
-            text_y += line_height + 10  # Move down for next line
+        for line, position in zip(layout['lines'], layout['positions']):
+            mask_draw.text(position, line, font=font, fill=255)
+        
+        # Outline is the fill mask dilated once; the shadow reuses it at an offset
+        outline_mask = self._dilate_mask(fill_mask, style.outline_width)
+        
+        if style.shadow:
+            img.paste(style.shadow_color, tuple(style.shadow_offset), outline_mask)
+        img.paste(style.outline_color, (0, 0), outline_mask)
+        img.paste(style.font_color, (0, 0), fill_mask)
         
         return img
     
+    def _create_caption_image_skia(self, text: str, style: CaptionStyle) -> Image.Image:
+        """Skia version of create_caption_image: same layout, native text and stroke rendering"""
+        layout = self._layout_caption(text, style)
+        
+        font_file = style.font_path or _SYSTEM_FONT
+        typeface = skia.Typeface.MakeFromFile(font_file) if font_file else None
+        font = skia.Font(typeface or skia.Typeface(''), style.font_size)
+        
+        def paint(color, stroke_width=0):
+            r, g, b = color[:3]
+            a = color[3] if len(color) > 3 else 255
+            p = skia.Paint(AntiAlias=True, Color=skia.Color(r, g, b, a))
+            if stroke_width:
+                p.setStyle(skia.Paint.kStrokeAndFill_Style)
+                p.setStrokeWidth(stroke_width * 2)  # Stroke is centered on the glyph edge
+                p.setStrokeJoin(skia.Paint.kRound_Join)
+            return p
+        
+        surface = skia.Surface(layout['width'], layout['height'])
+        canvas = surface.getCanvas()
+        canvas.clear(skia.ColorTRANSPARENT)
+        
+        # Draw background if specified
+        if style.background_color:
+            pad = style.background_padding
+            canvas.drawRect(
+                skia.Rect(pad, pad, layout['width'] - pad, layout['height'] - pad),
+                paint(style.background_color)
+            )
+        
+        shadow_paint = paint(style.shadow_color, style.outline_width)
+        outline_paint = paint(style.outline_color, style.outline_width)
+        fill_paint = paint(style.font_color)
+        dx, dy = style.shadow_offset
+        
+        for line, (x, y) in zip(layout['lines'], layout['positions']):
+            baseline = y + layout['ascent']
+            if style.shadow:
+                canvas.drawString(line, x + dx, baseline + dy, font, shadow_paint)
+            if style.outline_width > 0:
+                canvas.drawString(line, x, baseline, font, outline_paint)
+            canvas.drawString(line, x, baseline, font, fill_paint)
+        
+        pixels = surface.makeImageSnapshot().toarray(
+            colorType=skia.kRGBA_8888_ColorType,
+            alphaType=skia.kUnpremul_AlphaType
+        )
+        return Image.fromarray(pixels, 'RGBA')
+    
     def burn_captions(
         self, 
         video_path: str, 
@@ -242,7 +400,8 @@ class CaptionBurner:
         style: CaptionStyle = None,
         codec: str = 'libx264',
         crf: int = 18,
-        preset: str = 'medium'
+        preset: str = 'medium',
+        progress_callback: Optional[Callable[[float], None]] = None
     ) -> str:
         """
         Burn SRT captions onto video with custom styling.
@@ -255,118 +414,193 @@ class CaptionBurner:
             codec: Video codec (default: 'libx264')
             crf: Quality (0-51, lower = better, default: 18)
             preset: Encoding speed (ultrafast, fast, medium, slow, veryslow)
+            progress_callback: Called with the seconds of output encoded so far
         
         Returns:
             Path to output video
         """
-        if not os.path.exists(video_path):
-            raise FileNotFoundError(f"Video not found: {video_path}")
-        if not os.path.exists(srt_path):
-            raise FileNotFoundError(f"SRT not found: {srt_path}")
+        try:
+            os.stat(video_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Video not found: {video_path}") from None
+        
+        return self._encode(
+            ['-i', video_path], None, self._get_video_info(video_path), None,
+            srt_path, output_path, style, codec, crf, preset, progress_callback
+        )
+    
+    def stitch_and_burn(
+        self,
+        clip_paths: List[str],
+        audio_path: str,
+        srt_path: str,
+        output_path: str,
+        style: CaptionStyle = None,
+        codec: str = 'libx264',
+        crf: int = 18,
+        preset: str = 'veryfast',
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> str:
+        """
+        Stitch clips, add the voice-over and burn captions in a single FFmpeg pass,
+        so the video is decoded and encoded once instead of once per step.
+        The output lasts as long as the audio; the last frame is held if the clips are shorter.
+        
+        Args:
+            clip_paths: Video clips to concatenate, in order (same size and codec)
+            audio_path: Voice-over audio file path
+            srt_path: SRT subtitle file path
+            output_path: Output video file path
+            style, codec, crf, progress_callback: As in burn_captions
+            preset: x264 preset; 'veryfast' by default, since this single pass is the
+                whole video's encode. Use 'medium' or slower for final renders.
+        
+        Returns:
+            Path to output video
+        """
+        if not clip_paths:
+            raise ValueError("No video paths provided")
+        for path in clip_paths + [audio_path]:
+            try:
+                os.stat(path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Input not found: {path}") from None
+        
+        # The clip list lives next to the output so concurrent jobs never share it
+        clips_list = f"{output_path}.clips.ffconcat"
+        with open(clips_list, 'w', encoding='utf-8') as f:
+            f.write("ffconcat version 1.0\n")
+            for path in clip_paths:
+                f.write(f"file '{_escape_concat_path(os.path.abspath(path))}'\n")
+        
+        try:
+            return self._encode(
+                ['-f', 'concat', '-safe', '0', '-i', clips_list], None, self._get_video_info(clip_paths[0]),
+                audio_path, srt_path, output_path, style, codec, crf, preset, progress_callback
+            )
+        finally:
+            os.remove(clips_list)
+    
+    def compose_and_burn(
+        self,
+        video_inputs: List[str],
+        video_graph: str,
+        video_info: Dict,
+        audio_path: str,
+        srt_path: str,
+        output_path: str,
+        style: CaptionStyle = None,
+        codec: str = 'libx264',
+        crf: int = 18,
+        preset: str = 'veryfast',
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> str:
+        """
+        Like stitch_and_burn, but the video comes from a caller-built FFmpeg graph
+        (e.g. still images animated with filters) instead of pre-rendered clips.
+        
+        Args:
+            video_inputs: FFmpeg input arguments for the video sources
+            video_graph: filter_complex chain from those inputs to a [video] label
+            video_info: {'width', 'height', 'fps'} of the [video] stream
+            audio_path, srt_path, output_path, style, codec, crf, preset, progress_callback:
+                As in stitch_and_burn
+        
+        Returns:
+            Path to output video
+        """
+        try:
+            os.stat(audio_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Input not found: {audio_path}") from None
+        
+        return self._encode(
+            video_inputs, video_graph, video_info, audio_path,
+            srt_path, output_path, style, codec, crf, preset, progress_callback
+        )
+    
+    def _encode(
+        self,
+        video_inputs: List[str],
+        video_graph: Optional[str],
+        video_info: Dict,
+        audio_path: Optional[str],
+        srt_path: str,
+        output_path: str,
+        style: Optional[CaptionStyle],
+        codec: str,
+        crf: int,
+        preset: str,
+        progress_callback: Optional[Callable[[float], None]]
+    ) -> str:
+        """
+        Shared body of the public burn methods: one FFmpeg run from inputs to output.
+        video_graph, when given, turns video_inputs into a [video] stream; otherwise input 0 is used.
+        """
+        # Parse subtitles (parse_srt stats the file itself)
+        try:
+            subtitles = self.parse_srt(srt_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"SRT not found: {srt_path}") from None
+        print(f"Found {len(subtitles)} subtitle entries")
         
         style = style or CaptionStyle()
         
-        # Get video dimensions
-        video_info = self._get_video_info(video_path)
+        # Video dimensions
         video_width = video_info['width']
         video_height = video_info['height']
         fps = video_info['fps']
         
         print(f"Video: {video_width}x{video_height} @ {fps} fps")
         
-        # Parse subtitles
-        subtitles = self.parse_srt(srt_path)
-        print(f"Found {len(subtitles)} subtitle entries")
-        
-        # Create temp directory for caption images
-        self.temp_dir = tempfile.mkdtemp()
+        # Create temp directory for caption files
+        self.temp_dir = tempfile.mkdtemp(dir=_TEMP_ROOT)
         print(f"Working directory: {self.temp_dir}")
         
         try:
-            # Generate caption images
-            print("Generating caption images...")
-            caption_files = []
-            
-            for sub in subtitles:
-                img = self.create_caption_image(sub.text, video_width, video_height, style)
-                
-                # Calculate position
-                img_x = (video_width - img.width) // 2
-                if style.position == "top":
-                    img_y = style.margin
-                elif style.position == "middle":
-                    img_y = (video_height - img.height) // 2
-                else:  # bottom
-                    img_y = video_height - img.height - style.margin
-                
-                # Save image
-                img_path = os.path.join(self.temp_dir, f"caption_{sub.index:04d}.png")
-                img.save(img_path, 'PNG')
-                
-                caption_files.append({
-                    'path': img_path,
-                    'start': sub.start_time,
-                    'end': sub.end_time,
-                    'x': img_x,
-                    'y': img_y
-                })
-            
-            print(f"Generated {len(caption_files)} caption images")
-            
-            # Build FFmpeg filter complex for overlaying captions
-            print("Building FFmpeg filter...")
-            filter_parts = []
-            current_input = "[0:v]"
-            
-            for i, caption in enumerate(caption_files):
-                overlay_filter = (
-                    f"{current_input}[{i+1}:v]overlay="
-                    f"x={caption['x']}:y={caption['y']}:"
-                    f"enable='between(t,{caption['start']},{caption['end']})'"
+            # Hold the last frame so the video never ends before the voice-over;
+            # -shortest then cuts the output at the end of the audio
+            video = 'video' if video_graph else '0:v'
+            src = 'base' if audio_path else video
+            caption_index = video_inputs.count('-i')
+            if style.renderer == "pil":
+                caption_inputs, caption_filter = self._build_overlay_filter(
+                    subtitles, video_width, video_height, style, src, caption_index
+                )
+            else:
+                caption_inputs, caption_filter = self._build_ass_filter(
+                    subtitles, video_width, video_height, style, src
                 )
-                
-                if i < len(caption_files) - 1:
-                    overlay_filter += f"[v{i}]"
-                    current_input = f"[v{i}]"
-                else:
-                    overlay_filter += "[outv]"
-                
-                filter_parts.append(overlay_filter)
-            
-            filter_complex = ';'.join(filter_parts)
-            
-            # Build FFmpeg command
-            print("Encoding video with captions...")
-            cmd = ['ffmpeg', '-i', video_path]
             
-            # Add caption images as inputs
-            for caption in caption_files:
-                cmd.extend(['-loop', '1', '-i', caption['path']])
+            cmd = [FFMPEG_BIN] + video_inputs + caption_inputs
+            graph = f"{video_graph};" if video_graph else ""
+            if audio_path:
+                audio_index = caption_index + caption_inputs.count('-i')
+                cmd += ['-i', audio_path]
+                graph += f"[{video}]tpad=stop_mode=clone:stop=-1[base];{caption_filter}"
+                audio_args = ['-map', f'{audio_index}:a', '-c:a', 'aac', '-b:a', '192k', '-shortest']
+            else:
+                graph += caption_filter
+                audio_args = ['-map', '0:a?', '-c:a', 'copy']  # Copy audio without re-encoding
+                if caption_inputs:
+                    audio_args.append('-shortest')  # End when video ends, not the caption stream
             
-            # Add filter complex
-            cmd.extend([
-                '-filter_complex', filter_complex,
+            cmd += [
+                '-filter_complex', graph,
                 '-map', '[outv]',
-                '-map', '0:a?',  # Copy audio if exists
+                *audio_args,
                 '-c:v', codec,
                 '-crf', str(crf),
                 '-preset', preset,
-                '-c:a', 'copy',  # Copy audio without re-encoding
-                '-shortest',  # End when video ends
+                '-pix_fmt', 'yuv420p',  # 4:2:0, which every player decodes
+                '-threads', str(self.threads),
                 '-y',  # Overwrite output
                 output_path
-            ])
+            ]
             
             # Run FFmpeg
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                raise RuntimeError(f"FFmpeg failed: {result.stderr}")
+            print("Encoding video with captions...")
+            self._run_ffmpeg(cmd, progress_callback)
             
             print(f"✅ Success! Output: {output_path}")
             return output_path
@@ -377,10 +611,216 @@ class CaptionBurner:
                 shutil.rmtree(self.temp_dir)
                 print("Cleaned up temporary files")
     
+    def _run_ffmpeg(
+        self,
+        cmd: List[str],
+        progress_callback: Optional[Callable[[float], None]] = None,
+        tail_lines: int = 200
+    ):
+        """
+        Run FFmpeg streaming its output instead of buffering it until exit.
+        Progress is read from `-progress pipe:1` on stdout; only the last `tail_lines`
+        lines of stderr are kept for the error message.
+        """
+        cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + cmd[1:]
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        
+        # Drain stderr on a separate thread so neither pipe can fill up and block FFmpeg
+        tail = deque(maxlen=tail_lines)
+        stderr_reader = threading.Thread(target=tail.extend, args=(proc.stderr,), daemon=True)
+        stderr_reader.start()
+        
+        for line in proc.stdout:
+            key, _, value = line.strip().partition('=')
+            # out_time_ms is reported in microseconds despite its name
+            if key == 'out_time_ms' and value.isdigit() and progress_callback:
+                progress_callback(int(value) / 1_000_000)
+        
+        returncode = proc.wait()
+        stderr_reader.join()
+        
+        if returncode != 0:
+            raise RuntimeError(f"FFmpeg failed: {''.join(tail)}")
+    
+    def _srt_to_ass(
+        self,
+        subtitles: List[SubtitleEntry],
+        style: CaptionStyle,
+        video_width: int,
+        video_height: int
+    ) -> str:
+        """Build an ASS document that reproduces CaptionStyle with libass"""
+        font = self._get_font(style)
+        font_name, font_face = font.getname() if hasattr(font, 'getname') else ("Arial", "Regular")
+        # libass picks the face by family + weight, so carry the bold flag over
+        bold = -1 if font_face and 'bold' in font_face.lower() else 0
+        
+        if style.background_color:
+            # Opaque box: libass fills the box with OutlineColour, Outline is its padding
+            border_style = 3
+            outline_colour = _ass_color(style.background_color)
+            outline = style.background_padding
+        else:
+            border_style = 1
+            outline_colour = _ass_color(style.outline_color)
+            outline = style.outline_width
+        shadow = max(style.shadow_offset) if style.shadow else 0
+        side_margin = max(0, (video_width - style.max_width) // 2)
+        
+        header = (
+            "[Script Info]\n"
+            "ScriptType: v4.00+\n"
+            f"PlayResX: {video_width}\n"
+            f"PlayResY: {video_height}\n"
+            "WrapStyle: 0\n"
+            "ScaledBorderAndShadow: yes\n"
+            "\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+            "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+            "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+            f"Style: Default,{font_name},{style.font_size},"
+            f"{_ass_color(style.font_color)},{_ass_color(style.font_color)},"
+            f"{outline_colour},{_ass_color(style.shadow_color)},"
+            f"{bold},0,0,0,100,100,0,0,{border_style},{outline},{shadow},"
+            f"{_ASS_ALIGNMENT.get(style.position, 2)},{side_margin},{side_margin},{style.margin},1\n"
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        )
+        
+        events = [
+            f"Dialogue: 0,{_ass_timestamp(sub.start_time)},{_ass_timestamp(sub.end_time)},"
+            f"Default,,0,0,0,,{_ass_text(sub.text)}\n"
+            for sub in subtitles
+        ]
+        return header + ''.join(events)
+    
+    def _build_ass_filter(
+        self,
+        subtitles: List[SubtitleEntry],
+        video_width: int,
+        video_height: int,
+        style: CaptionStyle,
+        src: str
+    ) -> Tuple[List[str], str]:
+        """
+        Write the captions as one ASS file and burn them with a single subtitles filter.
+        Returns extra input args (none) and the filter graph from [src] to [outv].
+        """
+        print("Writing ASS subtitles...")
+        ass_path = os.path.join(self.temp_dir, "captions.ass")
+        with open(ass_path, 'w', encoding='utf-8') as f:
+            f.write(self._srt_to_ass(subtitles, style, video_width, video_height))
+        
+        subtitles_filter = f"subtitles=filename={_escape_filter_value(ass_path)}"
+        font_file = style.font_path or _SYSTEM_FONT
+        if font_file:
+            # Let libass find the font file by its family name
+            font_dir = os.path.dirname(os.path.abspath(font_file))
+            subtitles_filter += f":fontsdir={_escape_filter_value(font_dir)}"
+        
+        return [], f"[{src}]{subtitles_filter}[outv]"
+    
+    def _build_overlay_filter(
+        self,
+        subtitles: List[SubtitleEntry],
+        video_width: int,
+        video_height: int,
+        style: CaptionStyle,
+        src: str,
+        input_index: int
+    ) -> Tuple[List[str], str]:
+        """
+        Render each caption to a PNG with Pillow and overlay them as one timed image sequence.
+        Returns the caption stream input args (to be input `input_index`) and the filter
+        graph from [src] to [outv].
+        """
+        # Generate caption images. Identical cue text renders to an identical image,
+        # so each distinct text is rasterized once and reused on the timeline.
+        print("Generating caption images...")
+        unique_texts = list(dict.fromkeys(sub.text for sub in subtitles))
+        render_args = [
+            (text, k, video_width, video_height, style, self.temp_dir)
+            for k, text in enumerate(unique_texts, start=1)
+        ]
+        # Same CPU budget as the encode: several burners running at once (e.g. one per
+        # assembly worker) each get their share of the cores instead of all of them
+        workers = max(1, min(self.threads or os.cpu_count() or 1, len(render_args)))
+        
+        # Rasterizing and PNG-encoding is CPU bound and independent per subtitle,
+        # so spread it over processes. map() keeps the input order.
+        if workers == 1:
+            rendered = [_render_one_caption(args) for args in render_args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                rendered = list(executor.map(_render_one_caption, render_args))
+        
+        caption_paths = {text: caption['path'] for text, caption in zip(unique_texts, rendered)}
+        
+        print(f"Generated {len(rendered)} caption images for {len(subtitles)} subtitles")
+        
+        # Lay the captions out on a timeline as one image sequence for the concat demuxer,
+        # with a transparent frame filling the gaps. FFmpeg then decodes a single input
+        # and runs a single overlay instead of one looped input and overlay per caption.
+        print("Writing caption timeline...")
+        blank_path = os.path.join(self.temp_dir, "blank.png")
+        Image.new('RGBA', (video_width, video_height), (0, 0, 0, 0)).save(
+            blank_path, 'PNG', compress_level=1, optimize=False
+        )
+        
+        timeline = []
+        current_time = 0.0
+        for sub in sorted(subtitles, key=lambda entry: entry.start_time):
+            start = max(sub.start_time, current_time)
+            end = max(sub.end_time, start)
+            if start > current_time:
+                timeline.append((blank_path, start - current_time))
+            if end > start:
+                timeline.append((caption_paths[sub.text], end - start))
+            current_time = end
+        timeline.append((blank_path, 1.0))
+        
+        manifest_path = os.path.join(self.temp_dir, "captions.ffconcat")
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            f.write("ffconcat version 1.0\n")
+            for path, duration in timeline:
+                f.write(f"file '{_escape_concat_path(path)}'\nduration {duration:.3f}\n")
+            # The demuxer ignores the last entry's duration unless the file is repeated
+            f.write(f"file '{_escape_concat_path(blank_path)}'\n")
+        
+        return (
+            ['-f', 'concat', '-safe', '0', '-i', manifest_path],
+            f'[{src}][{input_index}:v]overlay=0:0:eof_action=pass[outv]'
+        )
+    
     def _get_video_info(self, video_path: str) -> Dict:
+        """Get video dimensions and fps (PyAV when installed, otherwise ffprobe)"""
+        if av is not None:
+            try:
+                with av.open(video_path) as container:
+                    stream = container.streams.video[0]
+                    if stream.average_rate:
+                        return {
+                            'width': stream.codec_context.width,
+                            'height': stream.codec_context.height,
+                            'fps': float(stream.average_rate)
+                        }
+            except Exception as e:
+                print(f"Warning: PyAV could not read {video_path}: {e}")
+        
+        return self._probe_video_info(video_path)
+    
+    def _probe_video_info(self, video_path: str) -> Dict:
         """Get video dimensions and fps using ffprobe"""
         cmd = [
-            'ffprobe',
+            FFPROBE_BIN,
             '-v', 'error',
             '-select_streams', 'v:0',
             '-show_entries', 'stream=width,height,r_frame_rate',
@@ -411,6 +851,55 @@ class CaptionBurner:
         return info
 
 
+_scratch = threading.local()
+
+
+def _frame_canvas(width: int, height: int) -> Image.Image:
+    """
+    Transparent full-frame canvas reused by every caption rendered on this thread
+    (one per worker process under ProcessPoolExecutor). Callers must clear what they draw.
+    """
+    canvas = getattr(_scratch, 'canvas', None)
+    if canvas is None or canvas.size != (width, height):
+        canvas = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        _scratch.canvas = canvas
+    return canvas
+
+
+def _render_one_caption(args: Tuple) -> Dict:
+    """
+    Render one full-frame caption PNG into temp_dir and return its path and caption position.
+    Module-level so it can be pickled by ProcessPoolExecutor.
+    """
+    text, index, video_width, video_height, style, temp_dir = args
+    img = CaptionBurner().create_caption_image(text, video_width, video_height, style)
+    
+    # Calculate position
+    img_x = (video_width - img.width) // 2
+    if style.position == "top":
+        img_y = style.margin
+    elif style.position == "middle":
+        img_y = (video_height - img.height) // 2
+    else:  # bottom
+        img_y = video_height - img.height - style.margin
+    
+    # Place the caption on a full-frame transparent canvas so every frame of the
+    # concatenated caption stream has the same size and overlays at 0:0
+    frame = _frame_canvas(video_width, video_height)
+    frame.paste(img, (img_x, img_y))
+    
+    # Save image
+    img_path = os.path.join(temp_dir, f"caption_{index:04d}.png")
+    try:
+        # Temp file read once by FFmpeg: favour encode speed over size
+        frame.save(img_path, 'PNG', compress_level=1, optimize=False)
+    finally:
+        # Clear only the area this caption touched, leaving the canvas ready for the next
+        frame.paste((0, 0, 0, 0), (img_x, img_y, img_x + img.width, img_y + img.height))
+    
+    return {'path': img_path, 'x': img_x, 'y': img_y}
+
+
 # Example usage
 if __name__ == "__main__":
     burner = CaptionBurner()
@@ -1,5 +1,6 @@
 import json
 import os
+import functools
 from pathlib import Path
 from typing import Dict, Any, List
 
@@ -21,6 +22,12 @@ class ConfigManager:
         
         with open(self._config_path, 'r') as f:
             self._config = json.load(f)
+        self._invalidate_sections()
+
+    def _invalidate_sections(self):
+        """Drop cached section views so the next access re-reads self._config."""
+        for name in self._CACHED_SECTIONS:
+            self.__dict__.pop(name, None)
 
     def save_config(self):
         with open(self._config_path, 'w') as f:
@@ -29,20 +36,25 @@ class ConfigManager:
     def get(self, key: str, default: Any = None) -> Any:
         return self._config.get(key, default)
 
-    # Type-safe accessors
-    @property
+    # Type-safe accessors, materialized once per instance (see _invalidate_sections)
+    _CACHED_SECTIONS = (
+        "api_keys", "sheets_config", "sheet_columns", "sheet_settings",
+        "paths", "video_settings", "ai_settings", "caption_settings", "whisper_settings"
+    )
+
+    @functools.cached_property
     def api_keys(self) -> Dict[str, str]:
         return self._config.get("api_keys", {})
 
-    @property
+    @functools.cached_property
     def sheets_config(self) -> Dict[str, Any]:
         return self._config.get("google_sheets", {})
 
-    @property
+    @functools.cached_property
     def sheet_columns(self) -> Dict[str, str]:
         return self.sheets_config.get("columns", {"id": "id", "script": "script", "status": "created"})
 
-    @property
+    @functools.cached_property
     def sheet_settings(self) -> Dict[str, Any]:
         """Returns extra sheet settings like search_keyword and status_values."""
         return {
@@ -57,26 +69,33 @@ class ConfigManager:
             })
         }
 
-    @property
+    @functools.cached_property
     def paths(self) -> Dict[str, str]:
         return self._config.get("paths", {})
 
-    @property
+    @functools.cached_property
     def video_settings(self) -> Dict[str, Any]:
         return self._config.get("video_settings", {})
     
-    @property
+    @functools.cached_property
     def ai_settings(self) -> Dict[str, Any]:
         return self._config.get("ai_settings", {})
 
-    @property
+    @functools.cached_property
     def caption_settings(self) -> Dict[str, Any]:
         return self._config.get("captions", {})
 
+    @functools.cached_property
+    def whisper_settings(self) -> Dict[str, Any]:
+        """SRTConfig overrides (e.g. compute_type, cpu_threads)."""
+        return self._config.get("whisper", {})
+
     def update_setting(self, section: str, key: str, value: Any):
         if section not in self._config:
             self._config[section] = {}
         self._config[section][key] = value
+        # Derived sections (e.g. sheet_columns) depend on others, so drop them all
+        self._invalidate_sections()
         self.save_config()
 
 # Global instance
@@ -1,17 +1,40 @@
+import asyncio
+import hashlib
+import os
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
 import json
 import random
+import shutil
 import time
 import threading
 import logging
 from pathlib import Path
 from typing import List, Optional, Union
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+HTTP_TIMEOUT = 120.0
+CHUNK_SIZE = 65536
+# A generated PNG is usually 1-3 MB; buffering writes this large turns the
+# 64 KiB network chunks into a couple of write() calls per image.
+WRITE_BUFFER = 1 << 20
+
+
+def _dumps(payload: dict) -> bytes:
+    """Serializes a request payload to bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
 class ImageGenerationError(Exception):
     """Raised for errors during the AI image generation process."""
     pass
@@ -27,7 +50,18 @@ class ImageGenerator:
                  output_dir: str = "temp_assets",
                  width: int = 1280,
                  height: int = 720,
-                 num_steps: int = 20):
+                 num_steps: int = 20,
+                 requests_per_minute: int = 100,
+                 pool_size: int = 16,
+                 cache_images: bool = True,
+                 cache_max_mb: Optional[float] = 500):
+        """
+        Args:
+            cache_images: Reuse a saved image for a repeated request (same prompt and slot).
+                False sends every request with a random seed and saves it under its filename.
+            cache_max_mb: Size cap of the sdxl_*.png cache in output_dir; the least recently
+                used images beyond it are deleted after each batch. None keeps them all.
+        """
         
         if not account_id or not api_token:
             raise ValueError("Cloudflare account ID and API token are required.")
@@ -38,53 +72,95 @@ class ImageGenerator:
         self.height = height
         self.num_steps = num_steps
         self.output_path = Path(output_dir)
+        self.cache_images = cache_images
+        self.cache_max_bytes = int(cache_max_mb * 1024 * 1024) if cache_max_mb else None
+        # Cached images written or reused since then belong to this run and are never pruned
+        self._started_at = time.time()
         
-        # Rate limiting
-        self._request_times = []
+        # Rate limiting (token bucket, refilled continuously)
+        self._capacity = float(requests_per_minute)
+        self._rate = requests_per_minute / 60.0
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
         self._lock = threading.Lock()
+
+        # Black PNG encoded once and copied for every fallback
+        self._fallback_src = self.output_path / f".fallback_black_{width}x{height}.png"
+        self._fallback_lock = threading.Lock()
         
         self.base_url = f"https://api.cloudflare.com/client/v4/accounts/{account_id}/ai/run/@cf/stabilityai/stable-diffusion-xl-base-1.0"
+        self._headers = {"Authorization": f"Bearer {self.api_token}", "Content-Type": "application/json"}
+
+        # One session per generator so sync calls reuse warm TLS connections.
+        # Retries are handled by generate_multiple, not by urllib3.
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+        self._session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0))
         self.output_path.mkdir(parents=True, exist_ok=True)
 
-    def _wait_for_rate_limit(self, requests_per_minute: int = 100):
+    def _rate_limit_delay(self) -> float:
+        """Takes one token and returns how long the caller must wait before sending."""
         with self._lock:
-            current_time = time.time()
-            self._request_times = [t for t in self._request_times if current_time - t < 60]
-            if len(self._request_times) >= requests_per_minute:
-                wait_time = 60 - (current_time - self._request_times[0]) + 0.1
-                logger.info(f"Rate limit reached, waiting {wait_time:.1f}s...")
-                time.sleep(wait_time)
-            self._request_times.append(time.time())
-
-    def _make_api_request(self, payload: dict) -> bytes:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+            self._last_refill = now
+            # Tokens may go negative: each waiter reserves its own slot further out
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            wait_time = -self._tokens / self._rate
+        logger.info(f"Rate limit reached, waiting {wait_time:.1f}s...")
+        return wait_time
+
+    def _wait_for_rate_limit(self):
+        wait_time = self._rate_limit_delay()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def _stream_to_file(self, payload: dict, file_path: Path) -> Path:
+        """Posts the payload and streams the PNG response straight into file_path."""
         self._wait_for_rate_limit()
         try:
-            response = requests.post(
-                self.base_url,
-                headers={"Authorization": f"Bearer {self.api_token}", "Content-Type": "application/json"},
-                data=json.dumps(payload),
-                timeout=120
-            )
-            response.raise_for_status()
-            return response.content
+            with self._session.post(self.base_url, data=_dumps(payload), stream=True, timeout=HTTP_TIMEOUT) as response:
+                response.raise_for_status()
+                # Copy from the raw urllib3 stream; decode_content keeps gzip handling intact
+                response.raw.decode_content = True
+                with open(file_path, "wb", buffering=WRITE_BUFFER) as f:
+                    shutil.copyfileobj(response.raw, f, CHUNK_SIZE)
+            return self._check_written(file_path)
         except requests.exceptions.RequestException as e:
+            self._discard_partial(file_path)
             raise ImageGenerationError(f"Cloudflare API error: {e}") from e
+        except OSError as e:
+            self._discard_partial(file_path)
+            raise ImageGenerationError(f"Failed to save image {file_path.name}: {e}") from e
 
-    def _save_image_data(self, image_data: bytes, filename: str) -> Path:
+    @staticmethod
+    def _check_written(file_path: Path) -> Path:
+        if file_path.stat().st_size == 0:
+            raise ImageGenerationError(f"Empty response body for {file_path.name}")
+        return file_path
+
+    @staticmethod
+    def _discard_partial(file_path: Path):
         try:
-            file_path = self.output_path / filename
-            with open(file_path, "wb") as f:
-                f.write(image_data)
-            return file_path
-        except Exception as e:
-            raise ImageGenerationError(f"Failed to save image {filename}: {e}") from e
+            file_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _ensure_fallback_source(self) -> Path:
+        with self._fallback_lock:
+            if not self._fallback_src.exists():
+                Image.new('RGB', (self.width, self.height), color='black').save(self._fallback_src)
+        return self._fallback_src
 
     def _create_fallback_image(self, filename: str) -> Path:
         """Creates a black image as fallback."""
         try:
             file_path = self.output_path / filename
-            img = Image.new('RGB', (self.width, self.height), color='black')
-            img.save(file_path)
+            # A copy rather than a hard link: a later retry writing to file_path
+            # must not truncate the shared source.
+            shutil.copyfile(self._ensure_fallback_source(), file_path)
             logger.warning(f"Created fallback black image for {filename}")
             return file_path
         except Exception as e:
@@ -93,13 +169,8 @@ class ImageGenerator:
 
     def generate_image(self, prompt: str, filename: str, negative_prompt: Optional[str] = None, seed: Optional[int] = None) -> Path:
         logger.info(f"Generatng: {filename}")
-        payload = {"prompt": prompt, "width": self.width, "height": self.height, "num_steps": self.num_steps}
-        if negative_prompt: payload["negative_prompt"] = negative_prompt
-        if seed: payload["seed"] = seed
-        
         try:
-            image_data = self._make_api_request(payload)
-            return self._save_image_data(image_data, filename)
+            return self._try_generate_image(prompt, filename, negative_prompt, seed)
         except Exception as e:
             logger.error(f"Failed to generate {filename}: {e}. Using fallback.")
             return self._create_fallback_image(filename)
@@ -117,59 +188,211 @@ class ImageGenerator:
         except Exception as e:
             pass
 
-    def _try_generate_image(self, prompt: str, filename: str, negative_prompt: str, seed: int) -> bytes:
-        payload = {"prompt": prompt, "width": self.width, "height": self.height, "num_steps": self.num_steps}
-        if negative_prompt: payload["negative_prompt"] = negative_prompt
+    @staticmethod
+    def _slot_seed(filename: str) -> int:
+        """
+        Seed for an image slot, derived from its filename: a resumed run asks for the same
+        image again, while different slots with the same prompt still get different images.
+        """
+        digest = hashlib.blake2b(filename.encode("utf-8"), digest_size=4).digest()
+        return int.from_bytes(digest, "big") % (2**32 - 1) + 1
+
+    def _cache_filename(self, prompt: str, negative_prompt: Optional[str], seed: int) -> str:
+        """Content-addressed name for an image request."""
+        key = hashlib.blake2b(
+            f"{prompt}|{self.width}x{self.height}|{self.num_steps}|{negative_prompt}|{seed}".encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        return f"sdxl_{key}.png"
+
+    def _payload_template(self, negative_prompt: Optional[str]) -> dict:
+        template = {"width": self.width, "height": self.height, "num_steps": self.num_steps}
+        if negative_prompt: template["negative_prompt"] = negative_prompt
+        return template
+
+    def _build_payload(self, prompt: str, negative_prompt: Optional[str], seed: Optional[int],
+                       template: Optional[dict] = None) -> dict:
+        payload = {"prompt": prompt, **(template or self._payload_template(negative_prompt))}
         if seed: payload["seed"] = seed
-        return self._make_api_request(payload)
+        return payload
+
+    def _try_generate_image(self, prompt: str, filename: str, negative_prompt: str, seed: int) -> Path:
+        return self._stream_to_file(self._build_payload(prompt, negative_prompt, seed), self.output_path / filename)
+
+    async def _try_generate_image_async(self, client: httpx.AsyncClient, payload: bytes, filename: str) -> Path:
+        """Async counterpart of _try_generate_image, sharing the rate limiter with the sync path."""
+        wait_time = self._rate_limit_delay()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        file_path = self.output_path / filename
+        # Written under a temporary name and renamed when complete, so an interrupted
+        # run never leaves a truncated image that a resumed run would reuse
+        part_path = file_path.with_name(file_path.name + ".part")
+        try:
+            async with client.stream("POST", self.base_url, content=payload) as response:
+                response.raise_for_status()
+                # Chunks are small page-cache writes, cheap enough to do on the loop
+                with open(part_path, "wb", buffering=WRITE_BUFFER) as f:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        f.write(chunk)
+            self._check_written(part_path)
+            os.replace(part_path, file_path)
+            return file_path
+        except httpx.HTTPError as e:
+            self._discard_partial(part_path)
+            raise ImageGenerationError(f"Cloudflare API error: {e}") from e
+        except OSError as e:
+            self._discard_partial(part_path)
+            raise ImageGenerationError(f"Failed to save image {file_path.name}: {e}") from e
+        except ImageGenerationError:
+            self._discard_partial(part_path)
+            raise
+
+    @staticmethod
+    def _retry_delay(attempt: int, error: Optional[Exception]) -> float:
+        """Exponential backoff with jitter; rate-limit (429) errors back off longer."""
+        delay = min(30.0, 0.5 * (2 ** attempt))
+        response = getattr(getattr(error, "__cause__", None), "response", None)
+        if getattr(response, "status_code", None) == 429:
+            delay = 30.0
+        return delay + random.uniform(0, 0.5)
+
+    async def _job_with_retries(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                index: int, payload: bytes, filename: str, max_retries: int) -> Optional[Path]:
+        for attempt in range(max_retries + 1):
+            try:
+                async with semaphore:
+                    return await self._try_generate_image_async(client, payload, filename)
+            except Exception as e:
+                logger.warning(f"Job {index} failed: {e}")
+                if attempt < max_retries:
+                    # Each job backs off on its own schedule, so retries do not arrive together
+                    delay = self._retry_delay(attempt, e)
+                    logger.info(f"Retrying job {index} in {delay:.1f}s (Attempt {attempt + 1}/{max_retries})")
+                    await asyncio.sleep(delay)
+        return None
+
+    async def _generate_batch(self, payloads: List[bytes], filenames: List[str],
+                              max_workers: int, max_retries: int) -> List[Optional[Path]]:
+        # One pooled client per batch: all jobs share its keep-alive TLS connections.
+        semaphore = asyncio.Semaphore(max_workers)
+        limits = httpx.Limits(max_keepalive_connections=max_workers, max_connections=max_workers, keepalive_expiry=60)
+        async with httpx.AsyncClient(limits=limits, headers=self._headers, timeout=HTTP_TIMEOUT) as client:
+            return await asyncio.gather(*[
+                self._job_with_retries(client, semaphore, i, payload, filename, max_retries)
+                for i, (payload, filename) in enumerate(zip(payloads, filenames))
+            ])
 
     def generate_multiple(self, prompts: List[str], filenames: List[str], negative_prompts: List[Optional[str]],
                           max_workers: int = 5, max_retries: int = 3) -> List[Path]:
         """
-        Generates multiple images in parallel.
-        Retries up to max_retries.
+        Generates multiple images concurrently on a single event loop.
+        At most `max_workers` requests are in flight at once. Each job retries up to max_retries.
         Falls back to black image if all retries fail.
+
+        With cache_images, generated images are saved under content-hash names (see
+        _cache_filename) and reused when they already exist, so a resumed run skips finished
+        requests; `filenames` name the fallback images and seed each slot (see _slot_seed).
+        Without it, every slot gets a random seed and is saved under its filename.
         """
         num_prompts = len(prompts)
-        jobs = [{
-            "index": i, "prompt": prompts[i], "filename": filenames[i],
-            "negative_prompt": negative_prompts[i], "seed": random.randint(1, 2**32 - 1)
-        } for i in range(num_prompts)]
-        
-        results = [None] * num_prompts
-        failed_jobs = jobs[:]
+        results: List[Optional[Path]] = [None] * num_prompts
 
-        for attempt in range(max_retries + 1):
-            if not failed_jobs:
-                break
-            
-            if attempt > 0:
-                logger.info(f"Retrying {len(failed_jobs)} images (Attempt {attempt}/{max_retries})")
-                time.sleep(2)
-
-            current_batch = failed_jobs
-            failed_jobs = []
-
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_job = {}
-                for job in current_batch:
-                    future = executor.submit(self._try_generate_image, job["prompt"], job["filename"], job["negative_prompt"], job["seed"])
-                    future_to_job[future] = job
-
-                for future in as_completed(future_to_job):
-                    job = future_to_job[future]
-                    try:
-                        image_data = future.result()
-                        path = self._save_image_data(image_data, job["filename"])
-                        results[job["index"]] = path
-                    except Exception as e:
-                        logger.warning(f"Job {job['index']} failed: {e}")
-                        failed_jobs.append(job)
+        if self.cache_images:
+            slot_seeds = [self._slot_seed(f) for f in filenames]
+            cache_names = [self._cache_filename(p, n, seed)
+                           for p, n, seed in zip(prompts, negative_prompts, slot_seeds)]
+        else:
+            slot_seeds = [random.randint(1, 2**32 - 1) for _ in filenames]
+            cache_names = list(filenames)
+
+        # Requests already on disk are done; identical requests in the batch are sent once
+        first_index = {}
+        for i, name in enumerate(cache_names):
+            cache_path = self.output_path / name
+            if self.cache_images and self._reuse_cached(cache_path):
+                results[i] = cache_path
+            elif name not in first_index:
+                first_index[name] = i
+        if num_prompts - len(first_index):
+            logger.info(f"Reusing {num_prompts - len(first_index)} of {num_prompts} images")
+
+        # Job j is described by the j-th entry of each parallel list
+        job_names = list(first_index)
+        job_indices = list(first_index.values())
+        seeds = [slot_seeds[i] for i in job_indices]
+
+        # Serialize every body once up front; retries resend the same bytes.
+        # Only the negative prompt varies between jobs, so templates are shared per value.
+        templates = {}
+        payloads = []
+        for i, seed in zip(job_indices, seeds):
+            neg = negative_prompts[i]
+            if neg not in templates:
+                templates[neg] = self._payload_template(neg)
+            payloads.append(_dumps(self._build_payload(prompts[i], neg, seed, templates[neg])))
+
+        if payloads:
+            generated = dict(zip(job_names, asyncio.run(
+                self._generate_batch(payloads, job_names, max_workers, max_retries)
+            )))
+            for i, name in enumerate(cache_names):
+                if results[i] is None:
+                    results[i] = generated.get(name)
 
         # Handle final failures with fallback
-        for job in failed_jobs:
-            logger.error(f"Job {job['index']} failed after all retries. using fallback.")
-            path = self._create_fallback_image(job["filename"])
-            results[job["index"]] = path
+        for i, path in enumerate(results):
+            if path is None:
+                logger.error(f"Job {i} failed after all retries. using fallback.")
+                results[i] = self._create_fallback_image(filenames[i])
 
+        if self.cache_images:
+            self._prune_cache()
         return results
+
+    @staticmethod
+    def _reuse_cached(cache_path: Path) -> bool:
+        """True if cache_path holds an image; it is then marked as recently used."""
+        try:
+            if cache_path.stat().st_size == 0:
+                return False
+            os.utime(cache_path)
+            return True
+        except OSError:
+            return False
+
+    def _prune_cache(self):
+        """
+        Deletes the least recently used sdxl_*.png images until the cache fits cache_max_bytes.
+        Images written or reused by this generator are kept: their videos may not be built yet.
+        """
+        if not self.cache_max_bytes:
+            return
+        entries = []
+        for path in self.output_path.glob("sdxl_*.png"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.cache_max_bytes:
+            return
+        removed = 0
+        for mtime, size, path in sorted(entries):
+            if total <= self.cache_max_bytes or mtime >= self._started_at:
+                break
+            self._discard_partial(path)
+            total -= size
+            removed += 1
+        logger.info(f"Pruned {removed} cached images; cache is now {total / (1024 * 1024):.0f} MB")
+
+    def close(self):
+        """Closes the pooled HTTP session."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,23 +1,26 @@
 import os
+import re
 import math
+import multiprocessing
+import wave
 import logging
+import threading
 import traceback
 import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
 # Custom Modules
 from app.config_manager import config
-from app.sheets_extractor import SheetsExtractor
+from app.sheets_extractor import SheetsExtractor, SheetBatchWriter
 from app.voice_generator import VoiceGenerator
 from app.srt_generator import SRTGenerator, SRTConfig
 from app.image_generator import ImageGenerator
 from app.ai_manager import AIManager
-from app.short_clips_maker import DynamicVideoGenerator
-from app.video_assembler import VideoAssembler
-from app.caption_burner import CaptionBurner, CaptionStyle
-import mutagen.wave
+from app.caption_burner import CaptionStyle
+from app.assembly_worker import assemble_video
+from app.video_assembler import threads_per_job
 
 # Configure logging
 logging.basicConfig(
@@ -30,8 +33,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Pipeline")
 
+# Characters stripped from script ids before they are used in file names
+_ID_SANITIZER = re.compile(r'[^\w\-]')
+
 class VideoPipeline:
-    def __init__(self):
+    def __init__(self, srt_generator: Optional[SRTGenerator] = None, keep_models_loaded: bool = False):
         self.temp_dir = Path(config.paths.get("temp_dir", "temp_assets"))
         self.output_dir = Path(config.paths.get("output_dir", "final_output"))
         self.temp_dir.mkdir(parents=True, exist_ok=True)
@@ -42,11 +48,35 @@ class VideoPipeline:
             config.sheets_config["sheet_id"],
             config.sheets_config["worksheet_name"]
         )
-        self.ai_manager = AIManager()
+        self.ai_manager = None
+        self.sheet_writer = None
+        # A caller-owned generator (the UI's) keeps its model loaded across runs
+        self.srt_generator = srt_generator
+        # Without it, Kokoro and Whisper are evicted once their stage is done, so their
+        # memory is free for assembly; a long-lived caller keeps them for the next run
+        self.keep_models_loaded = keep_models_loaded
+
+        # At most max_in_flight items hold media between image generation and the end of assembly
+        self.max_in_flight = max(1, config.video_settings.get("max_in_flight", 4))
+        self._pipeline_semaphore = threading.BoundedSemaphore(self.max_in_flight)
+        self._admission_lock = threading.Lock()
 
     def run(self, max_videos: int = 5):
         logger.info(f"Starting Bulk Video Pipeline (Max Videos: {max_videos})...")
-        
+
+        # One prompt client per run, so its pooled connections are closed with the run
+        self.ai_manager = AIManager()
+        # All sheet writes of the run go through one buffered writer
+        self.sheet_writer = SheetBatchWriter(self.sheets)
+        try:
+            self._run(max_videos)
+        finally:
+            self.sheet_writer.flush_and_close()
+            self.ai_manager.close()
+
+        logger.info("Pipeline Execution Complete.")
+
+    def _run(self, max_videos: int):
         # 1. Fetch Scripts
         pending_items = self._fetch_pending_scripts(max_videos)
         if not pending_items:
@@ -56,23 +86,23 @@ class VideoPipeline:
         # 2. Bulk Audio Generation
         self._generate_audio_bulk(pending_items)
 
-        # 3. Bulk SRT Generation
-        self._generate_srt_bulk(pending_items)
-
-        # 4. Prompt Generation
-        self._generate_prompts_bulk(pending_items)
-
-        # 5. Image Generation
-        self._generate_images_bulk(pending_items)
-
-        # 6. Video Assembly (Clips -> Stitch -> Audio -> Captions)
-        self._assemble_videos_bulk(pending_items)
+        # 3. Bulk SRT Generation, in the background
+        # 4-6. Prompts -> Images -> Assembly, streamed in small batches of items
+        # Whisper is CPU bound while prompts and images wait on the network, so the SRTs
+        # are produced alongside the first batches instead of before them.
+        # The jobs are picked here, so the background thread never reads or writes the items
+        srt_jobs = {
+            item["id"]: item["files"]["audio"]
+            for item in pending_items
+            if "audio" in item["files"] and item["status"] == "Pending"
+        }
+        with ThreadPoolExecutor(max_workers=1) as srt_executor:
+            srt_future = srt_executor.submit(self._generate_srt_bulk, srt_jobs)
+            self._stream_items(pending_items, srt_future)
 
         # 7. Final Cleanup & Sheet Update
         self._update_sheets(pending_items)
 
-        logger.info("Pipeline Execution Complete.")
-
     def _fetch_pending_scripts(self, limit: int) -> List[Dict[str, Any]]:
         logger.info(f"Fetching up to {limit} pending scripts from Google Sheets...")
         cols = config.sheet_columns
@@ -91,7 +121,7 @@ class VideoPipeline:
             items = []
             for row_num, data in rows:
                 script_id = data.get(id_col, str(row_num))
-                safe_id = "".join(x for x in script_id if x.isalnum() or x in "-_")
+                safe_id = _ID_SANITIZER.sub('', script_id)
                 script_text = data.get(script_col, '')
                 
                 items.append({
@@ -106,12 +136,8 @@ class VideoPipeline:
             
             # Status update to processing
             processing_status = settings["status_values"].get("processing", "Processing")
-            updates = []
             for item in items:
-                updates.append((item["row_number"], status_col, processing_status))
-            
-            if updates:
-                self.sheets.update_multiple_cells(updates)
+                self.sheet_writer.enqueue(item["row_number"], status_col, processing_status)
                 
             return items
         except Exception as e:
@@ -140,93 +166,238 @@ class VideoPipeline:
                 res = results.get(item["id"])
                 if res and res.success:
                     item["files"]["audio"] = res.output_path
-                    try:
-                        audio = mutagen.wave.WAVE(res.output_path)
-                        item["audio_duration"] = audio.info.length
-                    except:
-                        item["audio_duration"] = res.duration
+                    # The generator already knows the sample count; only re-read the header without it
+                    item["audio_duration"] = res.audio_duration or self._wav_duration(res.output_path)
                 else:
                     logger.error(f"Audio generation failed for {item['id']}: {res.error if res else 'Unknown'}")
                     item["status"] = status_vals.get("failed_audio", "Failed Audio")
                     
-            vg.unload_model()
+            vg.unload_model(evict=not self.keep_models_loaded)
         except Exception as e:
             logger.error(f"Critical error in audio generation: {e}")
             traceback.print_exc()
 
-    def _generate_srt_bulk(self, items: List[Dict]):
+    @staticmethod
+    def _wav_duration(path: str) -> float:
+        try:
+            with wave.open(path, "rb") as w:
+                return w.getnframes() / w.getframerate()
+        except (wave.Error, EOFError, OSError) as e:
+            logger.warning(f"Could not read WAV duration of {path}: {e}")
+            return 0.0
+
+    def _generate_srt_bulk(self, jobs: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """
+        Transcribes the audio of each item id in jobs. Returns item id -> SRT path, or None
+        when that item's SRT failed. Runs on a background thread, so the items themselves
+        are left alone; _apply_srt_results writes the outcome back on the main thread.
+        """
         logger.info("Phase 3: Bulk SRT Generation...")
-        status_vals = config.sheet_settings["status_values"]
-        
-        audio_files = []
-        srt_paths = []
-        mapping = [] # to map back to items
-        
-        for item in items:
-            if "audio" in item["files"] and item["status"] == "Pending":
-                audio_path = item["files"]["audio"]
-                srt_path = str(self.temp_dir / f"subs_{item['id']}.srt")
-                audio_files.append(audio_path)
-                srt_paths.append(srt_path)
-                mapping.append(item)
-
-        if not audio_files:
-            return
+        if not jobs:
+            return {}
+
+        ids = list(jobs)
+        audio_files = [jobs[item_id] for item_id in ids]
+        srt_paths = [str(self.temp_dir / f"subs_{item_id}.srt") for item_id in ids]
 
         try:
-            srt_gen = SRTGenerator(SRTConfig(model_path=config.paths["whisper_model"]))
+            srt_gen = self.srt_generator or SRTGenerator(
+                SRTConfig(model_path=config.paths["whisper_model"], **config.whisper_settings)
+            )
             results = srt_gen.generate_multiple_srts(audio_files, srt_paths)
-            srt_gen.unload_model()
-            
-            res_map = {path: success for path, success in results}
-            
-            for item in mapping:
-                audio = item["files"]["audio"]
-                if res_map.get(audio, False):
-                    item["files"]["srt"] = str(self.temp_dir / f"subs_{item['id']}.srt")
-                else:
-                    logger.error(f"SRT generation failed for {item['id']}")
-                    item["status"] = status_vals.get("failed_srt", "Failed SRT")
-                    
+            if srt_gen is not self.srt_generator:
+                srt_gen.unload_model(evict=not self.keep_models_loaded)
         except Exception as e:
             logger.error(f"Critical error in SRT generation: {e}")
             traceback.print_exc()
+            return {}
+
+        res_map = {path: success for path, success in results}
+        return {
+            item_id: srt_path if res_map.get(audio, False) else None
+            for item_id, audio, srt_path in zip(ids, audio_files, srt_paths)
+        }
+
+    @staticmethod
+    def _apply_srt_results(items: List[Dict], srt_results: Dict[str, Optional[str]]):
+        status_vals = config.sheet_settings["status_values"]
+        for item in items:
+            if item["id"] not in srt_results:
+                continue
+            srt_path = srt_results[item["id"]]
+            if srt_path:
+                item["files"]["srt"] = srt_path
+            elif item["status"] == "Pending":
+                logger.error(f"SRT generation failed for {item['id']}")
+                item["status"] = status_vals.get("failed_srt", "Failed SRT")
+
+    @staticmethod
+    def _srt_failed(item: Dict, srt_future: concurrent.futures.Future) -> bool:
+        """True once the SRT pass has finished without producing this item's subtitles."""
+        if not srt_future.done() or srt_future.exception() is not None:
+            return False
+        srt_results = srt_future.result()
+        return item["id"] in srt_results and srt_results[item["id"]] is None
 
     def _generate_prompts_bulk(self, items: List[Dict]):
         logger.info("Phase 4: Prompt Generation...")
         
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_item = {}
-            for item in items:
-                if item["status"] == "Pending":
-                    duration = item.get("audio_duration", 0)
-                    clip_dur = config.video_settings.get("clip_duration", 4.0)
-                    num_images = math.ceil(duration / clip_dur)
-                    item["num_images"] = max(1, num_images)
-                    
-                    chunk_size = len(item["script_text"]) // item["num_images"]
-                    
-                    for i in range(item["num_images"]):
-                        start = i * chunk_size
-                        end = start + chunk_size
-                        segment = item["script_text"][start:end]
-                        future = executor.submit(self.ai_manager.generate_prompts, segment)
-                        future_to_item[future] = (item, i)
-
-            for future in concurrent.futures.as_completed(future_to_item):
-                item, index = future_to_item[future]
-                if "prompts" not in item:
-                    item["prompts"] = [None] * item["num_images"]
+        segments = []
+        segment_map = [] # (item, image index) for each segment
+        for item in items:
+            if item["status"] == "Pending":
+                duration = item.get("audio_duration", 0)
+                clip_dur = config.video_settings.get("clip_duration", 4.0)
+                num_images = math.ceil(duration / clip_dur)
+                item["num_images"] = max(1, num_images)
+                item["prompts"] = [None] * item["num_images"]
                 
-                try:
-                    prompt = future.result()
-                    item["prompts"][index] = prompt
-                except Exception as e:
-                    logger.error(f"Prompt gen failed for {item['id']} index {index}: {e}")
-                    # Fallback comes from AIManager now, but just in case:
-                    item["prompts"][index] = config.ai_settings.get("general_fallback_prompt", "abstract cinematic background")
-
-    def _generate_images_bulk(self, items: List[Dict]):
+                # Even split boundaries; the last segment ends exactly at the end of the script
+                text = item["script_text"]
+                n = item["num_images"]
+                bounds = [len(text) * i // n for i in range(n + 1)]
+                
+                for i in range(n):
+                    segments.append(text[bounds[i]:bounds[i + 1]])
+                    segment_map.append((item, i))
+
+        if not segments:
+            return
+
+        try:
+            prompts = self.ai_manager.generate_prompts_batch(segments)
+        except Exception as e:
+            logger.error(f"Batch prompt generation failed: {e}")
+            traceback.print_exc()
+            # Fallback comes from AIManager now, but just in case:
+            fallback = config.ai_settings.get("general_fallback_prompt", "abstract cinematic background")
+            prompts = [fallback] * len(segments)
+
+        for (item, index), prompt in zip(segment_map, prompts):
+            item["prompts"][index] = prompt
+
+    def _stream_items(self, items: List[Dict], srt_future: concurrent.futures.Future):
+        """
+        Runs phases 4-6 as a pipeline. Prompts and images are produced per batch of items,
+        and each batch moves on to assembly as soon as its images exist, while later
+        batches are still being prompted.
+        """
+        # A batch is admitted whole, so it can never need more slots than exist
+        batch_size = max(1, min(config.video_settings.get("pipeline_batch_size", 4), self.max_in_flight))
+        pending = [item for item in items if item["status"] == "Pending"]
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        if not batches:
+            self._apply_srt_results(items, srt_future.result())
+            return
+
+        # One generator for every batch, so they share its connection pool and rate limit
+        try:
+            img_gen = self._create_image_generator()
+        except Exception as e:
+            logger.error(f"Global image generation failure: {e}")
+            img_gen = None
+
+        try:
+            self._run_batches(items, batches, len(pending), img_gen, srt_future)
+        finally:
+            if img_gen:
+                img_gen.close()
+
+    def _run_batches(
+        self,
+        items: List[Dict],
+        batches: List[List[Dict]],
+        n_items: int,
+        img_gen: Optional[ImageGenerator],
+        srt_future: concurrent.futures.Future
+    ):
+        """Body of _stream_items: feeds the batches through media generation and assembly."""
+        # Clip rendering is CPU bound Python, so assembly gets its own processes. No more than
+        # max_in_flight items reach assembly at once, and their encoders share the cores.
+        assembly_workers = max(1, min(self.max_in_flight, n_items, os.cpu_count() or 1))
+        assembly_settings = self._assembly_settings()
+        assembly_settings["encoder_threads"] = threads_per_job(assembly_workers)
+
+        with ThreadPoolExecutor(max_workers=2) as media_pool, \
+                ProcessPoolExecutor(
+                    max_workers=assembly_workers,
+                    # Forking now would copy the media, sheet writer and SRT threads' locks
+                    mp_context=multiprocessing.get_context('spawn')
+                ) as assembly_pool:
+            media_futures = {
+                media_pool.submit(self._prepare_media, batch, img_gen, srt_future): batch
+                for batch in batches
+            }
+            assembly_futures = {}
+            srt_applied = False
+
+            # Finished assemblies free in-flight slots that later media batches wait on,
+            # so both kinds of futures are handled as they complete
+            while media_futures or assembly_futures:
+                done, _ = concurrent.futures.wait(
+                    list(media_futures) + list(assembly_futures),
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    if future in media_futures:
+                        batch = media_futures.pop(future)
+                        try:
+                            future.result()
+                        except Exception as e:
+                            logger.error(f"Media generation uncaught error: {e}")
+
+                        # Captions need the SRTs, which Whisper produces for all items in one pass
+                        if not srt_applied:
+                            self._apply_srt_results(items, srt_future.result())
+                            srt_applied = True
+                        for item in batch:
+                            if item["status"] == "Pending":
+                                logger.info(f"Phase 6: Assembly of {item['id']}...")
+                                assembly_futures[assembly_pool.submit(assemble_video, item, assembly_settings)] = item
+                            else:
+                                self._pipeline_semaphore.release()
+                    else:
+                        item = assembly_futures.pop(future)
+                        try:
+                            item.update(future.result())
+                        except Exception as e:
+                            logger.error(f"Assembly uncaught error: {e}")
+                            item["status"] = config.sheet_settings["status_values"].get("failed_assembly", "Failed Assembly")
+                        self._pipeline_semaphore.release()
+                        # Report each video as it finishes rather than waiting for the whole run
+                        self._report_status(item)
+
+    def _prepare_media(
+        self,
+        items: List[Dict],
+        img_gen: Optional[ImageGenerator],
+        srt_future: concurrent.futures.Future
+    ):
+        # Take one in-flight slot per item before producing its images, so image generation
+        # cannot run ahead of assembly. Slots are taken under a lock so two batches never
+        # hold part of what they need while waiting on each other.
+        with self._admission_lock:
+            for _ in items:
+                self._pipeline_semaphore.acquire()
+        # Items whose SRT already failed will never be assembled; skip their paid API calls.
+        # Their status is set on the main thread once the SRT results are applied.
+        items = [item for item in items if not self._srt_failed(item, srt_future)]
+        self._generate_prompts_bulk(items)
+        items = [item for item in items if not self._srt_failed(item, srt_future)]
+        self._generate_images_bulk(items, img_gen)
+
+    def _create_image_generator(self) -> ImageGenerator:
+        return ImageGenerator(
+            account_id=config.api_keys["cloudflare_account_id"],
+            api_token=config.api_keys["cloudflare_api_token"],
+            output_dir=str(self.temp_dir),
+            width=config.video_settings["width"],
+            height=config.video_settings["height"],
+            cache_images=config.video_settings.get("image_cache", True),
+            cache_max_mb=config.video_settings.get("image_cache_max_mb", 500)
+        )
+
+    def _generate_images_bulk(self, items: List[Dict], img_gen: Optional[ImageGenerator]):
         logger.info("Phase 5: Image Generation...")
         
         all_prompts = []
@@ -246,18 +417,10 @@ class VideoPipeline:
                         all_negatives.append(neg_prompt)
                         job_map.append((item, i))
         
-        if not all_prompts:
+        if not all_prompts or img_gen is None:
             return
 
         try:
-            img_gen = ImageGenerator(
-                account_id=config.api_keys["cloudflare_account_id"],
-                api_token=config.api_keys["cloudflare_api_token"],
-                output_dir=str(self.temp_dir),
-                width=config.video_settings["width"],
-                height=config.video_settings["height"]
-            )
-            
             paths = img_gen.generate_multiple(all_prompts, all_filenames, all_negatives)
             
             for idx, path in enumerate(paths):
@@ -271,134 +434,39 @@ class VideoPipeline:
             logger.error(f"Global image generation failure: {e}")
             traceback.print_exc()
 
-    def _assemble_videos_bulk(self, items: List[Dict]):
-        logger.info("Phase 6: Assembly...")
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = []
-            for item in items:
-                if item["status"] == "Pending":
-                     futures.append(executor.submit(self._process_single_video_assembly, item))
-            
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    logger.error(f"Assembly uncaught error: {e}")
-
-    def _process_single_video_assembly(self, item: Dict):
-        status_vals = config.sheet_settings["status_values"]
-        try:
-            item_id = item["id"]
-            if not item.get("image_paths") or not all(item["image_paths"]):
-                logger.error(f"Missing images for {item_id}")
-                item["status"] = status_vals.get("failed_images", "Failed Images")
-                return
-
-            video_width = config.video_settings["width"]
-            video_height = config.video_settings["height"]
-            fps = config.video_settings["fps"]
-            clip_dur = config.video_settings["clip_duration"]
-
-            # 1. Create Clips
-            clip_maker = DynamicVideoGenerator()
-            clip_paths = []
-            
-            for i, img_path in enumerate(item["image_paths"]):
-                output_clip_name = str(self.temp_dir / f"clip_{item_id}_{i}.mp4")
-                
-                effects = []
-                if i == 0:
-                    effects = [
-                        {'type': 'zoom', 'mode': 'in', 'start': 0, 'duration': clip_dur, 'easing': 'linear'},
-                        {'type': 'fade', 'mode': 'out', 'start': clip_dur - 1.0, 'duration': 1.0}
-                    ]
-                elif i == len(item["image_paths"]) - 1:
-                    effects = [
-                        {'type': 'fade', 'mode': 'in', 'start': 0, 'duration': 1.0},
-                        {'type': 'zoom', 'mode': 'out', 'start': 0, 'duration': clip_dur, 'easing': 'linear'},
-                         {'type': 'fade', 'mode': 'out', 'start': clip_dur - 1.0, 'duration': 1.0}
-                    ]
-                else:
-                    effects = [
-                        {'type': 'fade', 'mode': 'in', 'start': 0, 'duration': 1.0},
-                        {'type': 'fade', 'mode': 'out', 'start': clip_dur - 1.0, 'duration': 1.0}
-                    ]
-
-                clip_maker.create_video(
-                    image_path=str(img_path),
-                    output_path=output_clip_name,
-                    effects_list=effects,
-                    width=video_width,
-                    height=video_height,
-                    fps=fps,
-                    duration=clip_dur
-                )
-                clip_paths.append(output_clip_name)
-
-            # 2. Stitch
-            assembler = VideoAssembler()
-            stitched_path = str(self.temp_dir / f"stitched_{item_id}.mp4")
-            assembler.stitch_videos(clip_paths, stitched_path)
-
-            # 3. Add Audio
-            video_audio_path = str(self.temp_dir / f"pre_caption_{item_id}.mp4")
-            assembler.add_voice(
-                video_path=stitched_path,
-                audio_path=item["files"]["audio"],
-                output_path=video_audio_path,
-                duration_mode='audio'
-            )
-
-            # 4. Burn Captions
-            final_path = str(self.output_dir / f"video_{item_id}.mp4")
-            burner = CaptionBurner()
-            
-            c_conf = config.caption_settings
-            style = CaptionStyle(
-                font_path=config.paths["fonts"],
-                font_size=c_conf.get("font_size", 52),
-                font_color=tuple(c_conf.get("font_color", (255,255,255))),
-                outline_color=tuple(c_conf.get("outline_color", (0,0,0))),
-                outline_width=c_conf.get("outline_width", 3),
-                position=c_conf.get("position", "bottom"),
-                margin=c_conf.get("margin", 50)
-            )
-
-            burner.burn_captions(
-                video_path=video_audio_path,
-                srt_path=item["files"]["srt"],
-                output_path=final_path,
-                style=style
-            )
-            
-            # Save Script Text
-            script_file_path = str(self.output_dir / f"script_{item_id}.txt")
-            with open(script_file_path, "w", encoding="utf-8") as f:
-                f.write(item["script_text"])
-
-            item["status"] = status_vals.get("done", "Done")
-            item["final_path"] = final_path
-            logger.info(f"Video completed: {final_path}")
-
-        except Exception as e:
-            logger.error(f"Assembly failed for {item.get('id')}: {e}")
-            item["status"] = status_vals.get("failed_assembly", "Failed Assembly")
-            traceback.print_exc()
+    def _assembly_settings(self) -> Dict[str, Any]:
+        """Picklable snapshot of the config needed by assemble_video in a worker process."""
+        c_conf = config.caption_settings
+        caption_style = CaptionStyle(
+            font_path=config.paths["fonts"],
+            font_size=c_conf.get("font_size", 52),
+            font_color=tuple(c_conf.get("font_color", (255,255,255))),
+            outline_color=tuple(c_conf.get("outline_color", (0,0,0))),
+            outline_width=c_conf.get("outline_width", 3),
+            position=c_conf.get("position", "bottom"),
+            margin=c_conf.get("margin", 50),
+            renderer=c_conf.get("renderer", "ass")
+        )
+        return {
+            "temp_dir": str(self.temp_dir),
+            "output_dir": str(self.output_dir),
+            "video": dict(config.video_settings),
+            "caption_style": caption_style,
+            "status_values": dict(config.sheet_settings["status_values"]),
+        }
+
+    def _report_status(self, item: Dict):
+        status_col = config.sheet_columns.get("status", "created")
+        self.sheet_writer.enqueue(item["row_number"], status_col, item["status"])
+        item["reported_status"] = item["status"]
 
     def _update_sheets(self, items: List[Dict]):
         logger.info("Phase 7: Updating Sheets...")
-        status_col = config.sheet_columns.get("status", "created")
-        done_val = config.sheet_settings["status_values"].get("done", "Done")
-        
-        updates = []
         for item in items:
-            # Update if done or failed (anything other than Pending)
-            if item["status"] != "Pending":
-                updates.append((item["row_number"], status_col, item["status"]))
-        
-        if updates:
-            self.sheets.update_multiple_cells(updates)
+            # Update if done or failed (anything other than Pending) and not reported yet
+            if item["status"] != "Pending" and item.get("reported_status") != item["status"]:
+                self._report_status(item)
 
 if __name__ == "__main__":
     pipeline = VideoPipeline()
-    pipeline.run()
\ No newline at end of file
+    pipeline.run()
\ No newline at end of file
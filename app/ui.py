@@ -1,28 +1,48 @@
 import logging
+import queue
 import threading
 import customtkinter as ctk
 from tkinter import Scrollbar, END
 from app.config_manager import config
 from app.main import VideoPipeline
+from app.srt_generator import SRTGenerator, SRTConfig
 
 # Configure CustomTkinter
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
+# Queued log lines reach the console at most this often, and at most this many per update
+LOG_FLUSH_MS = 100
+LOG_FLUSH_MAX_LINES = 500
+
 class TextHandler(logging.Handler):
-    """Logging handler that writes to a Tkiner textbox"""
+    """
+    Logging handler that writes to a Tkinter textbox. Records from any thread are queued
+    and flushed by the Tk loop in batches, one widget update per LOG_FLUSH_MS instead of
+    one scheduled callback per record.
+    """
     def __init__(self, textbox):
         super().__init__()
         self.textbox = textbox
+        self.queue = queue.SimpleQueue()
+        self.textbox.after(LOG_FLUSH_MS, self._flush)
 
     def emit(self, record):
-        msg = self.format(record)
-        def append():
+        self.queue.put(self.format(record))
+
+    def _flush(self):
+        lines = []
+        try:
+            while len(lines) < LOG_FLUSH_MAX_LINES:
+                lines.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        if lines:
             self.textbox.configure(state="normal")
-            self.textbox.insert(END, msg + "\n")
+            self.textbox.insert(END, "\n".join(lines) + "\n")
             self.textbox.configure(state="disabled")
             self.textbox.see(END)
-        self.textbox.after(0, append)
+        self.textbox.after(LOG_FLUSH_MS, self._flush)
 
 class App(ctk.CTk):
     def __init__(self):
@@ -76,6 +96,14 @@ class App(ctk.CTk):
         self.logger.addHandler(handler)
 
         self.pipeline_running = False
+        # Created on the first run; its Whisper model stays loaded until the window closes
+        self.srt_generator = None
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        if self.srt_generator is not None and not self.pipeline_running:
+            self.srt_generator.unload_model(evict=True)
+        self.destroy()
 
     def start_pipeline(self):
         if self.pipeline_running:
@@ -88,6 +116,11 @@ class App(ctk.CTk):
             self.count_entry.delete(0, END)
             self.count_entry.insert(0, "5")
 
+        if self.srt_generator is None:
+            self.srt_generator = SRTGenerator(
+                SRTConfig(model_path=config.paths["whisper_model"], **config.whisper_settings)
+            )
+
         self.pipeline_running = True
         self.start_btn.configure(state="disabled", text="Running...")
         self.status_label.configure(text=f"Pipeline Running (Max: {max_v})...")
@@ -97,7 +130,7 @@ class App(ctk.CTk):
 
     def _run_pipeline_thread(self, max_v):
         try:
-            pipeline = VideoPipeline()
+            pipeline = VideoPipeline(srt_generator=self.srt_generator, keep_models_loaded=True)
             pipeline.run(max_videos=max_v)
             self.after(0, lambda: self.status_label.configure(text="Completed Successfully"))
         except Exception as e:
@@ -1,7 +1,7 @@
 """
 Video Assembler with Voice (FFmpeg-based)
 A tool to stitch multiple videos together and add voice-over with volume control.
-Handles old OpenCV encodings and outputs in libx264 format.
+Handles old OpenCV encodings and outputs H.264 (a hardware encoder when available, else libx264).
 
 Requirements:
 - FFmpeg must be installed on your system
@@ -9,43 +9,227 @@ Requirements:
 """
 
 import ffmpeg
-from typing import List, Literal
+from typing import List, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import os
+import shutil
 import subprocess
-import json
+import tempfile
+
+# FFmpeg binaries, looked up on PATH once rather than by every call
+FFMPEG_BIN = shutil.which('ffmpeg') or 'ffmpeg'
+FFPROBE_BIN = shutil.which('ffprobe') or 'ffprobe'
+
+# ffprobe codec_name produced by each encoder, to tell whether inputs are already in the output codec
+ENCODER_CODEC_NAMES = {'libx264': 'h264', 'libx265': 'hevc', 'libvpx-vp9': 'vp9', 'libaom-av1': 'av1',
+                       'h264_nvenc': 'h264', 'h264_qsv': 'h264', 'h264_amf': 'h264'}
+
+# Hardware H.264 encoders tried by codec='auto', in order of preference. All of them take
+# frames from system memory (VAAPI and VideoToolbox need an upload filter or have no
+# constant-quality mode, so they are only used when asked for explicitly).
+HW_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_amf')
+
+# Encoders whose row-based multithreading is switched on explicitly (older FFmpeg builds leave it off)
+ROW_MT_ENCODERS = ('libvpx-vp9', 'libaom-av1')
+
+
+def threads_per_job(n_jobs: int) -> int:
+    """Encoder threads for each of n_jobs concurrent encodes, so together they use every core once."""
+    return max(1, (os.cpu_count() or 1) // max(1, n_jobs))
 
 
 class VideoAssembler:
     """Assembles multiple videos and adds voice-over with flexible duration control using FFmpeg."""
     
-    def __init__(self):
+    def __init__(self, default_preset: str = 'veryfast', default_tune: Optional[str] = None,
+                 threads: int = 0):
+        """
+        Args:
+            default_preset: x264 preset of every encode unless a call overrides it. 'veryfast'
+                encodes about twice as fast as 'medium' at the same CRF, a little softer;
+                use 'medium' or 'slow' for final renders where encode time does not matter.
+            default_tune: Optional x264 tune (e.g. 'fastdecode' for weak playback devices,
+                at some extra file size)
+            threads: Encoder threads per encode; 0 lets the encoder use every core. When
+                several assemblers encode at the same time, pass threads_per_job(n_jobs)
+                so they don't oversubscribe the CPU.
+        """
         self.temp_files = []
+        self.default_preset = default_preset
+        self.default_tune = default_tune
+        self.threads = threads
+        # ffprobe results by (absolute path, mtime, size): a rewritten file is probed again
+        self._probe_cache = {}
+    
+    def _probe(self, path: str) -> dict:
+        """ffmpeg.probe, run once per version of a file."""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if key not in self._probe_cache:
+            self._probe_cache[key] = ffmpeg.probe(path, cmd=FFPROBE_BIN)
+        return self._probe_cache[key]
     
     def _get_video_duration(self, video_path: str) -> float:
         """Get duration of a video file in seconds."""
-        probe = ffmpeg.probe(video_path)
-        duration = float(probe['streams'][0]['duration'])
-        return duration
+        # Container duration: streams[0] isn't always the video, and not every
+        # container (e.g. MKV/WebM) stores a per-stream duration
+        return float(self._probe(video_path)['format']['duration'])
     
     def _get_audio_duration(self, audio_path: str) -> float:
         """Get duration of an audio file in seconds."""
-        probe = ffmpeg.probe(audio_path)
-        for stream in probe['streams']:
+        probe = self._probe(audio_path)
+        if not any(stream['codec_type'] == 'audio' for stream in probe['streams']):
+            raise ValueError("No audio stream found in file")
+        return float(probe['format']['duration'])
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _detect_hw_encoder() -> Optional[str]:
+        """
+        The first of HW_ENCODERS that works on this machine, or None. Being compiled into
+        FFmpeg doesn't mean the GPU or driver is there, so each candidate encodes one tiny
+        test frame. Runs once per process.
+        """
+        try:
+            result = subprocess.run([FFMPEG_BIN, '-hide_banner', '-encoders'],
+                                    capture_output=True, text=True)
+        except OSError:
+            return None
+        available = set(result.stdout.split())
+        for encoder in HW_ENCODERS:
+            if encoder not in available:
+                continue
+            test = subprocess.run(
+                [FFMPEG_BIN, '-hide_banner', '-v', 'error', '-f', 'lavfi', '-i', 'color=size=256x256',
+                 '-frames:v', '1', '-c:v', encoder, '-f', 'null', '-'],
+                capture_output=True
+            )
+            if test.returncode == 0:
+                return encoder
+        return None
+    
+    def _resolve_codec(self, codec: str) -> str:
+        """codec, with 'auto' replaced by the detected hardware encoder or libx264."""
+        if codec == 'auto':
+            return self._detect_hw_encoder() or 'libx264'
+        return codec
+    
+    def _encode_args(self, codec: str, crf: int, preset: Optional[str] = None) -> dict:
+        """
+        Output arguments shared by every re-encode: video settings, 4:2:0 pixels, AAC audio,
+        faststart. crf is mapped to each hardware encoder's constant-quality setting.
+        """
+        codec = self._resolve_codec(codec)
+        # 4:2:0 plays everywhere; odd inputs would otherwise carry 4:4:4 through, which
+        # costs more to encode and isn't supported by most players (Quick Sync takes NV12)
+        pix_fmt = 'nv12' if codec == 'h264_qsv' else 'yuv420p'
+        args = {'vcodec': codec, 'pix_fmt': pix_fmt, 'threads': self.threads}
+        if codec == 'h264_nvenc':
+            args.update({'preset': 'p4', 'tune': 'hq', 'rc': 'vbr', 'cq': crf, 'b:v': 0})
+        elif codec == 'h264_qsv':
+            args.update({'preset': preset or self.default_preset, 'global_quality': crf})
+        elif codec == 'h264_amf':
+            args.update({'rc': 'cqp', 'qp_i': crf, 'qp_p': crf})
+        else:
+            args.update({'crf': crf, 'preset': preset or self.default_preset})
+            if codec == 'libx264':
+                args['profile:v'] = 'high'
+            if self.default_tune:
+                args['tune'] = self.default_tune
+        args.update({'acodec': 'aac', 'audio_bitrate': '192k', 'movflags': '+faststart'})
+        if codec in ROW_MT_ENCODERS:
+            args['row-mt'] = 1
+        return args
+    
+    def _audio_is_aac(self, audio_path: str) -> bool:
+        """True when the file's first audio stream is AAC, i.e. it can be copied into the MP4 as is."""
+        for stream in self._probe(audio_path)['streams']:
             if stream['codec_type'] == 'audio':
-                return float(stream['duration'])
-        raise ValueError("No audio stream found in file")
+                return stream['codec_name'] == 'aac'
+        return False
+    
+    def _copy_audio(self, output_args: dict):
+        """Switch encode arguments to stream-copying the audio."""
+        output_args['acodec'] = 'copy'
+        del output_args['audio_bitrate']
+    
+    def _stream_signature(self, path: str) -> tuple:
+        """The stream parameters that have to match for a concat without re-encoding."""
+        keys = {
+            'video': ('codec_name', 'width', 'height', 'pix_fmt', 'r_frame_rate', 'time_base'),
+            'audio': ('codec_name', 'sample_rate', 'channels'),
+        }
+        return tuple(
+            (stream['codec_type'],) + tuple(stream.get(key) for key in keys[stream['codec_type']])
+            for stream in self._probe(path)['streams']
+            if stream['codec_type'] in keys
+        )
+    
+    def _streams_compatible(self, video_paths: List[str], codec: str) -> bool:
+        """
+        True when every input has the same streams, already encoded the way the re-encode
+        would (video in codec as 4:2:0, audio in AAC), so the concat demuxer can copy them
+        as they are.
+        """
+        signatures = {self._stream_signature(path) for path in video_paths}
+        if len(signatures) != 1:
+            return False
+        streams = signatures.pop()
+        video_codecs = {stream[1] for stream in streams if stream[0] == 'video'}
+        audio_codecs = {stream[1] for stream in streams if stream[0] == 'audio'}
+        codec = self._resolve_codec(codec)
+        pix_fmts = {stream[4] for stream in streams if stream[0] == 'video'}
+        return (video_codecs == {ENCODER_CODEC_NAMES.get(codec, codec)} and pix_fmts == {'yuv420p'}
+                and audio_codecs <= {'aac'})
+    
+    def _check_and_probe(self, path: str) -> bool:
+        """Whether path exists; fills the probe cache for it when it does."""
+        if not os.path.exists(path):
+            return False
+        try:
+            self._probe(path)
+        except ffmpeg.Error:
+            pass  # Raised again, with context, where the probe is needed
+        return True
+    
+    def _write_concat_file(self, video_paths: List[str]) -> str:
+        """Verify the inputs exist, probe them and write the concat demuxer list for them."""
+        # Check and probe all files at once; each probe is its own ffprobe process
+        unique_paths = list(dict.fromkeys(video_paths))
+        with ThreadPoolExecutor(max_workers=min(16, len(unique_paths))) as pool:
+            found = list(pool.map(self._check_and_probe, unique_paths))
+        missing = [path for path, exists in zip(unique_paths, found) if not exists]
+        if missing:
+            raise FileNotFoundError(f"Video file(s) not found: {', '.join(missing)}")
+        
+        # Create a temporary file list for FFmpeg concat
+        # A unique temp file, so concurrent workers never share one list
+        fd, concat_file = tempfile.mkstemp(suffix='.ffconcat')
+        # Absolute paths with quotes escaped, written as one block of bytes
+        payload = b''.join(
+            b"file '%s'\n" % os.path.abspath(path).replace('\\', '/').encode('utf-8').replace(b"'", b"'\\''")
+            for path in video_paths
+        )
+        try:
+            os.write(fd, payload)
+        finally:
+            os.close(fd)
+        
+        self.temp_files.append(concat_file)
+        return concat_file
     
     def stitch_videos(self, video_paths: List[str], output_path: str, 
-                      codec: str = 'libx264', crf: int = 23, preset: str = 'medium') -> str:
+                      codec: str = 'auto', crf: int = 23, preset: Optional[str] = None) -> str:
         """
         Stitch multiple videos together into a single video with libx264 encoding.
         
         Args:
             video_paths: List of paths to video files
             output_path: Path for the output video
-            codec: Video codec (default: 'libx264')
+            codec: Video codec; 'auto' (default) uses a hardware encoder when one works, else libx264
             crf: Constant Rate Factor for quality (0-51, lower is better, default: 23)
-            preset: Encoding preset (ultrafast, fast, medium, slow, veryslow)
+            preset: Encoding preset (ultrafast, veryfast, medium, slow, ...; default: default_preset)
         
         Returns:
             Path to the stitched video
@@ -53,45 +237,89 @@ class VideoAssembler:
         if not video_paths:
             raise ValueError("No video paths provided")
         
-        # Verify all files exist
-        for path in video_paths:
-            if not os.path.exists(path):
-                raise FileNotFoundError(f"Video file not found: {path}")
-        
-        # Create a temporary file list for FFmpeg concat
-        concat_file = "concat_list.txt"
-        with open(concat_file, 'w') as f:
-            for path in video_paths:
-                # Convert to absolute path and escape special characters
-                abs_path = os.path.abspath(path)
-                f.write(f"file '{abs_path}'\n")
+        concat_file = self._write_concat_file(video_paths)
         
-        self.temp_files.append(concat_file)
+        # Inputs already in the output format are joined at the bitstream level; anything
+        # else (such as OpenCV's mp4v) is re-encoded to codec
+        stream_copy = self._streams_compatible(video_paths, codec)
+        if stream_copy:
+            output_args = {'c': 'copy', 'movflags': '+faststart'}
+        else:
+            output_args = self._encode_args(codec, crf, preset)
         
-        # Stitch videos using FFmpeg concat demuxer with re-encoding to libx264
+        # Stitch videos using FFmpeg concat demuxer
         try:
             (
                 ffmpeg
                 .input(concat_file, format='concat', safe=0)
-                .output(output_path, 
-                       vcodec=codec,
-                       crf=crf,
-                       preset=preset,
-                       acodec='aac',
-                       audio_bitrate='192k')
+                .output(output_path, **output_args)
                 .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+                .run(cmd=FFMPEG_BIN, capture_stdout=True, capture_stderr=True)
             )
             
             duration = self._get_video_duration(output_path)
             print(f"✓ Stitched {len(video_paths)} videos. Total duration: {duration:.2f}s")
-            print(f"✓ Output: {output_path} (codec: {codec})")
+            print(f"✓ Output: {output_path} (codec: {self._resolve_codec(codec)}, {'stream copy' if stream_copy else 're-encoded'})")
             return output_path
             
         except ffmpeg.Error as e:
             error_msg = e.stderr.decode() if e.stderr else str(e)
             raise RuntimeError(f"FFmpeg error during stitching: {error_msg}")
     
+    def _voice_streams(self, video, video_duration: float, audio_path: str, audio_duration: float,
+                       volume: float, duration_mode: str, start_time: float,
+                       fade_in: float, fade_out: float):
+        """
+        The voice-over graph of add_voice for any video input node.
+        Returns (video, audio, output_duration); output_duration is None in "video" mode.
+        """
+        # A voice shorter than the video is looped by the demuxer (atrim below cuts it at the
+        # video's end), rather than by aloop holding the whole clip in memory
+        loop_audio = duration_mode == "video" and audio_duration < video_duration
+        
+        # Prepare audio stream with volume control
+        audio = ffmpeg.input(audio_path, stream_loop=-1) if loop_audio else ffmpeg.input(audio_path)
+        
+        # Build audio filter chain as (name, args, kwargs)
+        audio_filters = []
+        
+        # Volume adjustment
+        if volume != 1.0:
+            audio_filters.append(('volume', (volume,), {}))
+        
+        # Fade in/out
+        if fade_in > 0:
+            audio_filters.append(('afade', (), {'t': 'in', 'st': 0, 'd': fade_in}))
+        if fade_out > 0:
+            # A looped voice fades out at the end of the video instead of after the first pass
+            fade_start = (video_duration - start_time if loop_audio else audio_duration) - fade_out
+            audio_filters.append(('afade', (), {'t': 'out', 'st': fade_start, 'd': fade_out}))
+        
+        # Delay audio if start_time is specified
+        if start_time > 0:
+            delay_ms = int(start_time * 1000)
+            audio_filters.append(('adelay', (f'{delay_ms}|{delay_ms}',), {}))
+        
+        # Apply audio filters as one linear chain
+        if audio_filters:
+            audio = audio.filter('aformat', channel_layouts='stereo')
+            for name, args, kwargs in audio_filters:
+                audio = audio.filter(name, *args, **kwargs)
+        
+        # Determine final duration
+        if duration_mode == "video":
+            # Trim (looped) audio to video duration
+            audio = audio.filter('atrim', duration=video_duration)
+            output_duration = None  # Use video duration
+        else:  # duration_mode == "audio"
+            # Extend or trim video to match audio duration
+            if video_duration < audio_duration + start_time:
+                # Loop video if needed
+                video = video.filter('loop', loop=-1, size=1)
+            output_duration = audio_duration + start_time
+        
+        return video, audio, output_duration
+    
     def add_voice(self,
                   video_path: str,
                   audio_path: str,
@@ -101,7 +329,7 @@ class VideoAssembler:
                   start_time: float = 0.0,
                   fade_in: float = 0.0,
                   fade_out: float = 0.0,
-                  codec: str = 'libx264',
+                  codec: str = 'auto',
                   crf: int = 23) -> str:
         """
         Add voice-over to video with volume control and duration options.
@@ -115,7 +343,7 @@ class VideoAssembler:
             start_time: When to start audio in video (seconds)
             fade_in: Audio fade in duration (seconds)
             fade_out: Audio fade out duration (seconds)
-            codec: Video codec (default: 'libx264')
+            codec: Video codec; 'auto' (default) uses a hardware encoder when one works, else libx264
             crf: Constant Rate Factor for quality (default: 23)
         
         Returns:
@@ -129,62 +357,102 @@ class VideoAssembler:
         video_duration = self._get_video_duration(video_path)
         audio_duration = self._get_audio_duration(audio_path)
         
-        # Prepare audio stream with volume control
-        audio = ffmpeg.input(audio_path)
+        # No filter changes the samples, so an AAC voice goes into the output untouched
+        audio_untouched = (volume == 1.0 and fade_in == 0 and fade_out == 0 and start_time == 0
+                           and duration_mode == "audio" and self._audio_is_aac(audio_path))
         
-        # Build audio filter chain
-        audio_filters = []
+        video, audio, output_duration = self._voice_streams(
+            ffmpeg.input(video_path), video_duration, audio_path, audio_duration,
+            volume, duration_mode, start_time, fade_in, fade_out
+        )
         
-        # Volume adjustment
-        if volume != 1.0:
-            audio_filters.append(f'volume={volume}')
+        # Merge video and audio
+        try:
+            output_args = self._encode_args(codec, crf)
+            if audio_untouched:
+                self._copy_audio(output_args)
+            
+            if output_duration:
+                output_args['t'] = output_duration
+            
+            (
+                ffmpeg
+                .output(video, audio, output_path, **output_args)
+                .overwrite_output()
+                .run(cmd=FFMPEG_BIN)
+                #.run(cmd=FFMPEG_BIN, capture_stdout=True, capture_stderr=True)
+            )
+            
+            print(f"✓ Added voice to video")
+            print(f"  Video duration: {video_duration:.2f}s")
+            print(f"  Audio duration: {audio_duration:.2f}s")
+            print(f"  Mode: {duration_mode}")
+            print(f"  Output: {output_path}")
+            return output_path
+            
+        except ffmpeg.Error as e:
+            error_msg = e.stderr.decode() if e.stderr else str(e)
+            raise RuntimeError(f"FFmpeg error during audio addition: {error_msg}")
+    
+    def stitch_and_voice(self,
+                         video_paths: List[str],
+                         audio_path: str,
+                         output_path: str,
+                         volume: float = 1.0,
+                         duration_mode: Literal["video", "audio"] = "video",
+                         start_time: float = 0.0,
+                         fade_in: float = 0.0,
+                         fade_out: float = 0.0,
+                         codec: str = 'auto',
+                         crf: int = 23,
+                         preset: Optional[str] = None) -> str:
+        """
+        Stitch videos and add a voice-over in a single encode.
         
-        # Fade in/out
-        if fade_in > 0:
-            audio_filters.append(f'afade=t=in:st=0:d={fade_in}')
-        if fade_out > 0:
-            fade_start = audio_duration - fade_out
-            audio_filters.append(f'afade=t=out:st={fade_start}:d={fade_out}')
+        Same result as stitch_videos followed by add_voice, but the concat demuxer
+        feeds the voice-over graph directly, so the frames are encoded once and no
+        intermediate file is written.
         
-        # Delay audio if start_time is specified
-        if start_time > 0:
-            audio_filters.append(f'adelay={int(start_time * 1000)}|{int(start_time * 1000)}')
+        Args:
+            video_paths: List of paths to video files
+            audio_path: Path to audio file
+            output_path: Path for output video
+            volume: Volume multiplier (0.0 to 2.0, default: 1.0)
+            duration_mode: "video" = match video length, "audio" = match audio length
+            start_time: When to start audio in video (seconds)
+            fade_in: Audio fade in duration (seconds)
+            fade_out: Audio fade out duration (seconds)
+            codec: Video codec; 'auto' (default) uses a hardware encoder when one works, else libx264
+            crf: Constant Rate Factor for quality (default: 23)
+            preset: Encoding preset (default: default_preset)
         
-        # Apply audio filters
-        if audio_filters:
-            audio = audio.filter('aformat', channel_layouts='stereo').filter_multi_output(
-                ','.join(audio_filters)
-            )
+        Returns:
+            Path to the output video with voice-over
+        """
+        if not video_paths:
+            raise ValueError("No video paths provided")
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        # Load video
-        video = ffmpeg.input(video_path)
+        concat_file = self._write_concat_file(video_paths)
         
-        # Determine final duration
-        if duration_mode == "video":
-            # Trim or loop audio to match video duration
-            if audio_duration < video_duration:
-                # Loop audio if it's shorter
-                loops = int(video_duration / audio_duration) + 1
-                audio = audio.filter('aloop', loop=loops, size=int(audio_duration * 48000))
-            # Trim to video duration
-            audio = audio.filter('atrim', duration=video_duration)
-            output_duration = None  # Use video duration
-        else:  # duration_mode == "audio"
-            # Extend or trim video to match audio duration
-            if video_duration < audio_duration + start_time:
-                # Loop video if needed
-                video = video.filter('loop', loop=-1, size=1)
-            output_duration = audio_duration + start_time
+        # The stitched length is the sum of the inputs (probes are cached)
+        video_duration = sum(self._get_video_duration(path) for path in video_paths)
+        audio_duration = self._get_audio_duration(audio_path)
+        
+        # No filter changes the samples, so an AAC voice goes into the output untouched
+        audio_untouched = (volume == 1.0 and fade_in == 0 and fade_out == 0 and start_time == 0
+                           and duration_mode == "audio" and self._audio_is_aac(audio_path))
+        
+        video, audio, output_duration = self._voice_streams(
+            ffmpeg.input(concat_file, format='concat', safe=0), video_duration,
+            audio_path, audio_duration, volume, duration_mode, start_time, fade_in, fade_out
+        )
         
-        # Merge video and audio
         try:
-            output_args = {
-                'vcodec': codec,
-                'crf': crf,
-                'preset': 'medium',
-                'acodec': 'aac',
-                'audio_bitrate': '192k'
-            }
+            output_args = self._encode_args(codec, crf, preset)
+            if audio_untouched:
+                self._copy_audio(output_args)
             
             if output_duration:
                 output_args['t'] = output_duration
@@ -193,11 +461,10 @@ class VideoAssembler:
                 ffmpeg
                 .output(video, audio, output_path, **output_args)
                 .overwrite_output()
-                .run()
-                #.run(capture_stdout=True, capture_stderr=True)
+                .run(cmd=FFMPEG_BIN, capture_stdout=True, capture_stderr=True)
             )
             
-            print(f"✓ Added voice to video")
+            print(f"✓ Stitched {len(video_paths)} videos with voice-over in one pass")
             print(f"  Video duration: {video_duration:.2f}s")
             print(f"  Audio duration: {audio_duration:.2f}s")
             print(f"  Mode: {duration_mode}")
@@ -206,14 +473,14 @@ class VideoAssembler:
             
         except ffmpeg.Error as e:
             error_msg = e.stderr.decode() if e.stderr else str(e)
-            raise RuntimeError(f"FFmpeg error during audio addition: {error_msg}")
+            raise RuntimeError(f"FFmpeg error during stitching with voice: {error_msg}")
     
     def merge_audio_tracks(self,
                           video_path: str,
                           audio_paths: List[str],
                           output_path: str,
                           volumes: List[float] = None,
-                          codec: str = 'libx264',
+                          codec: str = 'auto',
                           crf: int = 23) -> str:
         """
         Merge multiple audio tracks with the video.
@@ -223,7 +490,7 @@ class VideoAssembler:
             audio_paths: List of audio file paths
             output_path: Path for output video
             volumes: List of volume multipliers for each audio track
-            codec: Video codec (default: 'libx264')
+            codec: Video codec; 'auto' (default) uses a hardware encoder when one works, else libx264
             crf: Constant Rate Factor for quality
         
         Returns:
@@ -241,32 +508,34 @@ class VideoAssembler:
         # Load video
         video = ffmpeg.input(video_path)
         
-        # Load and process audio tracks
-        audio_streams = []
-        for i, (audio_path, vol) in enumerate(zip(audio_paths, volumes)):
-            audio = ffmpeg.input(audio_path)
-            if vol != 1.0:
-                audio = audio.filter('volume', vol)
-            audio_streams.append(audio)
+        # Load audio tracks
+        audio_streams = [ffmpeg.input(audio_path) for audio_path in audio_paths]
         
-        # Mix all audio streams
+        # Mix all audio streams; amix applies the volumes itself, each track at exactly its
+        # volume (no 1/N normalization) and without fading the rest when a short track ends
         if len(audio_streams) > 1:
-            mixed_audio = ffmpeg.filter(audio_streams, 'amix', inputs=len(audio_streams))
+            mixed_audio = ffmpeg.filter(
+                audio_streams, 'amix', inputs=len(audio_streams),
+                weights=' '.join(f'{vol:.4f}' for vol in volumes),
+                normalize=0, dropout_transition=0
+            )
+        elif volumes[0] != 1.0:
+            mixed_audio = audio_streams[0].filter('volume', volumes[0])
         else:
             mixed_audio = audio_streams[0]
         
+        output_args = self._encode_args(codec, crf)
+        # A single AAC track at its own volume needs no mixing or re-encoding
+        if len(audio_paths) == 1 and volumes[0] == 1.0 and self._audio_is_aac(audio_paths[0]):
+            self._copy_audio(output_args)
+        
         # Output with merged audio
         try:
             (
                 ffmpeg
-                .output(video, mixed_audio, output_path,
-                       vcodec=codec,
-                       crf=crf,
-                       preset='medium',
-                       acodec='aac',
-                       audio_bitrate='192k')
+                .output(video, mixed_audio, output_path, **output_args)
                 .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+                .run(cmd=FFMPEG_BIN, capture_stdout=True, capture_stderr=True)
             )
             
             print(f"✓ Merged {len(audio_paths)} audio tracks")
@@ -328,7 +597,18 @@ if __name__ == "__main__":
     # except Exception as e:
     #     print(f"Error adding voice: {e}")
     
-    # # Example 4: Merge multiple audio tracks
+    # # Example 4: Stitch and add voice-over in a single encode
+    # try:
+    #     final = assembler.stitch_and_voice(
+    #         video_paths=['video1.mp4', 'video2.mp4', 'video3.mp4'],
+    #         audio_path='voiceover.mp3',
+    #         output_path='final_with_voice.mp4',
+    #         duration_mode='audio'
+    #     )
+    # except Exception as e:
+    #     print(f"Error stitching with voice: {e}")
+    
+    # # Example 5: Merge multiple audio tracks
     # try:
     #     merged = assembler.merge_audio_tracks(
     #         video_path='video.mp4',
@@ -5,8 +5,11 @@ Optimized for quick single and batch audio generation
 
 import os
 import gc
+import functools
 import time
 import logging
+import threading
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Union, List, Optional
 from dataclasses import dataclass
@@ -24,13 +27,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Audio handed to libsndfile per write, in seconds; shorter chunks are gathered first
+WAV_FLUSH_SECONDS = 0.25
+
+# Test utterance for checking a quantized model against the full-precision one
+QUANTIZE_CHECK_TEXT = "The quick brown fox jumps over the lazy dog."
+# Largest accepted mean difference of log-magnitude spectra between the two
+QUANTIZE_MAX_SPECTRAL_ERROR = 0.5
+
+# Loaded Kokoro pipelines shared by every VoiceGenerator in the process, by the settings that built them
+_PIPELINE_CACHE = {}
+_PIPELINE_CACHE_LOCK = threading.Lock()
+
+
+def _spectral_error(reference: np.ndarray, audio: np.ndarray, frame: int = 1024) -> float:
+    """
+    Mean absolute difference of the log-magnitude spectra of two renderings of the same
+    text; a large length mismatch counts as infinitely different.
+    """
+    n = min(len(reference), len(audio))
+    if n < frame or abs(len(reference) - len(audio)) > 0.1 * max(len(reference), len(audio)):
+        return float('inf')
+    
+    def log_spectrum(x):
+        frames = x[:n - n % frame].reshape(-1, frame) * np.hanning(frame)
+        return np.log1p(np.abs(np.fft.rfft(frames, axis=1)))
+    
+    return float(np.mean(np.abs(log_spectrum(reference) - log_spectrum(audio))))
+
+
+@functools.lru_cache(maxsize=None)
+def _cpu_supports_bf16() -> bool:
+    """True when the CPU has native bfloat16 math (AVX-512 BF16 or AMX)"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        pass
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
 
 @dataclass
 class GenerationResult:
     """Result of audio generation"""
     success: bool
     output_path: Optional[str] = None
-    duration: Optional[float] = None
+    duration: Optional[float] = None  # generation time in seconds
+    audio_duration: Optional[float] = None  # length of the written audio in seconds
     error: Optional[str] = None
 
 
@@ -53,7 +100,10 @@ class VoiceGenerator:
         voice_path: str,
         sample_rate: int = 24000,
         lang_code: str = 'a',
-        cpu_threads: int = 4
+        cpu_threads: int = 4,
+        reduced_precision: bool = True,
+        compile_model: bool = False,
+        quantize: bool = False
     ):
         """
         Initialize the VoiceGenerator.
@@ -64,6 +114,15 @@ class VoiceGenerator:
             sample_rate: Audio sample rate (default: 24000)
             lang_code: Language code (default: 'a')
             cpu_threads: CPU threads to use (default: 4)
+            reduced_precision: Run inference under autocast, FP16 on CUDA or BF16 on
+                CPUs with native bfloat16 support (default: True)
+            compile_model: Compile the Kokoro model with torch.compile when it is loaded;
+                slower first load, faster chunks afterwards. Falls back to eager mode if
+                compilation fails (default: False)
+            quantize: Dynamically quantize the model's Linear/LSTM layers to int8 when it
+                runs on the CPU. A test utterance is compared with the full-precision
+                model and the quantized one is dropped if it sounds too different
+                (default: False)
         
         Raises:
             ValueError: If paths are invalid
@@ -81,6 +140,9 @@ class VoiceGenerator:
         self.sample_rate = sample_rate
         self.lang_code = lang_code
         self.cpu_threads = cpu_threads
+        self.reduced_precision = reduced_precision
+        self.compile_model = compile_model
+        self.quantize = quantize
         
         # Configure CPU
         self._configure_cpu()
@@ -119,6 +181,20 @@ class VoiceGenerator:
         torch.set_num_threads(self.cpu_threads)
         os.environ['OMP_NUM_THREADS'] = str(self.cpu_threads)
         os.environ['MKL_NUM_THREADS'] = str(self.cpu_threads)
+        torch.set_float32_matmul_precision('high')
+        torch.backends.mkldnn.enabled = True
+    
+    def _inference_context(self) -> ExitStack:
+        """inference_mode, plus autocast where the hardware has fast reduced-precision math"""
+        stack = ExitStack()
+        stack.enter_context(torch.inference_mode())
+        if self.reduced_precision:
+            if torch.cuda.is_available():
+                stack.enter_context(torch.autocast(device_type='cuda', dtype=torch.float16))
+            elif not self.quantize and _cpu_supports_bf16():
+                # Not with quantize: int8 layers expect float32 activations
+                stack.enter_context(torch.autocast(device_type='cpu', dtype=torch.bfloat16))
+        return stack
     
     def load_model(self) -> bool:
         """
@@ -135,13 +211,22 @@ class VoiceGenerator:
             return True
         
         try:
-            logger.info("Loading Kokoro TTS model...")
-            self.pipeline = KPipeline(
-                lang_code=self.lang_code,
-                repo_id=self.model_path
-            )
+            key = self._pipeline_key()
+            with _PIPELINE_CACHE_LOCK:
+                if key not in _PIPELINE_CACHE:
+                    logger.info("Loading Kokoro TTS model...")
+                    pipeline = KPipeline(
+                        lang_code=self.lang_code,
+                        repo_id=self.model_path
+                    )
+                    if self.quantize:
+                        self._quantize(pipeline)
+                    if self.compile_model:
+                        self._compile(pipeline)
+                    _PIPELINE_CACHE[key] = pipeline
+                    logger.info("✓ Model loaded successfully")
+                self.pipeline = _PIPELINE_CACHE[key]
             self._is_loaded = True
-            logger.info("✓ Model loaded successfully")
             return True
         
         except Exception as e:
@@ -149,14 +234,74 @@ class VoiceGenerator:
             logger.error(error_msg)
             raise RuntimeError(error_msg) from e
     
-    def unload_model(self):
-        """Unload model and free memory"""
+    def _pipeline_key(self) -> tuple:
+        """The settings a cached pipeline was built with"""
+        return (self.lang_code, self.model_path, self.compile_model, self.quantize)
+    
+    def _quantize(self, pipeline: KPipeline):
+        """
+        Swap the pipeline's model for a dynamically int8-quantized one if it runs on the
+        CPU and a test utterance stays close to the full-precision output.
+        """
+        model = getattr(pipeline, 'model', None)
+        if model is None or next(model.parameters()).device.type != 'cpu':
+            return
+        try:
+            reference = self._test_utterance(pipeline)
+            pipeline.model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8
+            )
+            error = _spectral_error(reference, self._test_utterance(pipeline))
+        except Exception as e:
+            pipeline.model = model
+            logger.warning(f"int8 quantization failed, using full precision: {e}")
+            return
+        if error > QUANTIZE_MAX_SPECTRAL_ERROR:
+            pipeline.model = model
+            logger.warning(f"int8 model differs too much ({error:.3f}), using full precision")
+        else:
+            logger.info(f"✓ Model quantized to int8 (spectral error {error:.3f})")
+    
+    def _test_utterance(self, pipeline: KPipeline) -> np.ndarray:
+        """QUANTIZE_CHECK_TEXT spoken by pipeline as float32 samples"""
+        with self._inference_context():
+            chunks = [
+                audio.float().cpu().numpy() if torch.is_tensor(audio) else np.asarray(audio)
+                for _, _, audio in pipeline(QUANTIZE_CHECK_TEXT, voice=self.voice_path)
+            ]
+        return np.concatenate(chunks)
+    
+    def _compile(self, pipeline: KPipeline):
+        """
+        Swap the pipeline's model for a torch.compile'd one. Compilation happens on the
+        first call, so a short warm-up runs here; if it fails the eager model is put back.
+        """
+        if getattr(pipeline, 'model', None) is None:
+            return
+        eager_model = pipeline.model
+        try:
+            pipeline.model = torch.compile(eager_model, mode='reduce-overhead', dynamic=True)
+            with self._inference_context():
+                for _ in pipeline("Hi.", voice=self.voice_path):
+                    pass
+            logger.info("✓ Model compiled")
+        except Exception as e:
+            pipeline.model = eager_model
+            logger.warning(f"torch.compile failed, using eager mode: {e}")
+    
+    def unload_model(self, evict: bool = False):
+        """
+        Release this generator's model. It stays cached for the next VoiceGenerator unless
+        evict is set; an evicted model is freed once no other generator still holds it.
+        """
         if self.pipeline:
-            del self.pipeline
             self.pipeline = None
             self._is_loaded = False
-            gc.collect()
-            logger.info("Model unloaded")
+            if evict:
+                with _PIPELINE_CACHE_LOCK:
+                    _PIPELINE_CACHE.pop(self._pipeline_key(), None)
+                gc.collect()
+                logger.info("Model unloaded")
     
     def generate(
         self,
@@ -183,65 +328,86 @@ class VoiceGenerator:
         self._validate_generate_params(text, output_path, overwrite)
         
         start_time = time.time()
-        temp_path = output_path + ".tmp"
         
+        try:
+            return self._synthesize(text, output_path, start_time)
+        
+        except Exception as e:
+            return self._failure(e)
+    
+    def _synthesize(self, text: str, output_path: str, start_time: float) -> GenerationResult:
+        """Run the pipeline over text, streaming each chunk to disk as it is produced"""
+        logger.info(f"Generating: {Path(output_path).name}")
+        
+        # POSIX renames over an existing file atomically, so the WAV is built next to it and
+        # moved into place. On Windows the extra file only means a second antivirus scan, so
+        # it is written in place and removed if generation fails.
+        temp_path = output_path + ".tmp" if os.name == 'posix' else output_path
         try:
             # Ensure output directory exists
             output_dir = os.path.dirname(output_path)
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
             
-            logger.info(f"Generating: {Path(output_path).name}")
-            
-            # Generate audio in chunks
-            all_audio = []
+            # Generate audio in chunks, appending each to the WAV so only one chunk is in memory
+            num_samples = 0
             chunk_count = 0
+            pending = []
+            pending_samples = 0
+            flush_samples = int(self.sample_rate * WAV_FLUSH_SECONDS)
             
-            for _, _, audio in self.pipeline(text, voice=self.voice_path):
-                all_audio.append(audio)
-                chunk_count += 1
+            with sf.SoundFile(temp_path, mode='w', samplerate=self.sample_rate, channels=1,
+                              format='WAV', subtype='PCM_16') as out, self._inference_context():
+                for _, _, audio in self.pipeline(text, voice=self.voice_path):
+                    if torch.is_tensor(audio):
+                        # Autocast may hand back half-precision samples
+                        audio = audio.float().cpu().numpy()
+                    pending.append(audio)
+                    pending_samples += len(audio)
+                    num_samples += len(audio)
+                    chunk_count += 1
+                    if pending_samples >= flush_samples:
+                        out.write(pending[0] if len(pending) == 1 else np.concatenate(pending))
+                        pending.clear()
+                        pending_samples = 0
+                if pending:
+                    out.write(np.concatenate(pending))
             
-            # Combine and write
-            if all_audio:
-                combined_audio = np.concatenate(all_audio)
-                sf.write(temp_path, combined_audio, self.sample_rate, format='WAV')
-                
-                # Move temp to final location
-                if os.path.exists(output_path):
-                    os.remove(output_path)
-                os.rename(temp_path, output_path)
-                
-                del combined_audio
-            else:
+            if not chunk_count:
                 raise RuntimeError("No audio generated from pipeline")
             
-            duration = time.time() - start_time
-            logger.info(f"✓ Generated in {duration:.2f}s ({chunk_count} chunks)")
-            
-            return GenerationResult(
-                success=True,
-                output_path=output_path,
-                duration=duration
-            )
+            # Move temp to final location
+            if temp_path != output_path:
+                os.replace(temp_path, output_path)
         
-        except Exception as e:
-            error_msg = f"Generation failed: {e}"
-            logger.error(error_msg)
-            
-            # Cleanup temp file
+        except Exception:
+            # Cleanup temp (or partial) file
             if os.path.exists(temp_path):
                 try:
                     os.remove(temp_path)
                 except OSError:
                     pass
-            
-            return GenerationResult(
-                success=False,
-                error=error_msg
-            )
+            raise
         
-        finally:
-            gc.collect()
+        duration = time.time() - start_time
+        logger.info(f"✓ Generated in {duration:.2f}s ({chunk_count} chunks)")
+        
+        return GenerationResult(
+            success=True,
+            output_path=output_path,
+            duration=duration,
+            audio_duration=num_samples / self.sample_rate
+        )
+    
+    def _failure(self, e: Exception) -> GenerationResult:
+        """Log and build the result of a failed generation"""
+        error_msg = f"Generation failed: {e}"
+        logger.error(error_msg)
+        
+        return GenerationResult(
+            success=False,
+            error=error_msg
+        )
     
     def _validate_generate_params(
         self,
@@ -335,14 +501,22 @@ class VoiceGenerator:
             logger.info(f"[{idx}/{len(text_dict)}] Processing: {name}")
             
             try:
-                result = self.generate(text, output_path, overwrite)
-                results[name] = result
+                self._validate_generate_params(text, output_path, overwrite)
             except Exception as e:
                 logger.error(f"Failed to process {name}: {e}")
                 results[name] = GenerationResult(
                     success=False,
                     error=str(e)
                 )
+                continue
+            
+            try:
+                results[name] = self._synthesize(text, output_path, time.time())
+            except Exception as e:
+                results[name] = self._failure(e)
+        
+        # Once per batch rather than after every file
+        gc.collect()
         
         # Summary
         successful = sum(1 for r in results.values() if r.success)